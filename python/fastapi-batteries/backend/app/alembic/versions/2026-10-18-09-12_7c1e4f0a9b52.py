@@ -0,0 +1,60 @@
+"""UserFollow composite indexes
+
+Revision ID: 7c1e4f0a9b52
+Revises: bd06d96281d3
+Create Date: 2026-10-18 09:12:41.503218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+import sqlmodel  # added
+
+
+# revision identifiers, used by Alembic.
+revision = "7c1e4f0a9b52"
+down_revision = "bd06d96281d3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Keep one follow per pair (uuid7 ids sort by creation) so the unique index builds
+    op.execute(
+        """
+        DELETE FROM "UserFollow" AS duplicate
+        USING "UserFollow" AS kept
+        WHERE duplicate.user_id = kept.user_id
+        AND duplicate.target_user_id = kept.target_user_id
+        AND duplicate.id > kept.id
+        """
+    )
+    op.execute(
+        """
+        UPDATE "User" SET
+        follower_count = (
+            SELECT count(*) FROM "UserFollow" WHERE target_user_id = "User".id
+        ),
+        following_count = (
+            SELECT count(*) FROM "UserFollow" WHERE user_id = "User".id
+        )
+        """
+    )
+    op.create_index(
+        "ix_UserFollow_user_id_target_user_id",
+        "UserFollow",
+        ["user_id", "target_user_id"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_UserFollow_target_user_id_user_id",
+        "UserFollow",
+        ["target_user_id", "user_id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_UserFollow_target_user_id_user_id", table_name="UserFollow")
+    op.drop_index("ix_UserFollow_user_id_target_user_id", table_name="UserFollow")
@@ -0,0 +1,42 @@
+"""pg_trgm indexes for user and hero search
+
+Revision ID: 4f9a2c81d6e3
+Revises: 7c1e4f0a9b52
+Create Date: 2026-10-18 10:47:05.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+import sqlmodel  # added
+
+
+# revision identifiers, used by Alembic.
+revision = "4f9a2c81d6e3"
+down_revision = "7c1e4f0a9b52"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_User_full_name_trgm",
+        "User",
+        [sa.text("(first_name || ' ' || last_name) gin_trgm_ops")],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_Hero_name_trgm",
+        "Hero",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade():
+    op.drop_index("ix_Hero_name_trgm", table_name="Hero")
+    op.drop_index("ix_User_full_name_trgm", table_name="User")
@@ -0,0 +1,44 @@
+"""image media renditions
+
+Revision ID: b8d3e5f1c0a7
+Revises: 4f9a2c81d6e3
+Create Date: 2026-10-18 13:20:41.562310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+import sqlmodel  # added
+
+
+# revision identifiers, used by Alembic.
+revision = "b8d3e5f1c0a7"
+down_revision = "4f9a2c81d6e3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "ImageMedia",
+        sa.Column("original_id", sqlmodel.sql.sqltypes.GUID(), nullable=True),
+    )
+    op.create_foreign_key(
+        "ImageMedia_original_id_fkey",
+        "ImageMedia",
+        "ImageMedia",
+        ["original_id"],
+        ["id"],
+    )
+    op.create_index(
+        op.f("ix_ImageMedia_original_id"),
+        "ImageMedia",
+        ["original_id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(op.f("ix_ImageMedia_original_id"), table_name="ImageMedia")
+    op.drop_constraint("ImageMedia_original_id_fkey", "ImageMedia", type_="foreignkey")
+    op.drop_column("ImageMedia", "original_id")
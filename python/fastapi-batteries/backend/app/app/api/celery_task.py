@@ -1,11 +1,22 @@
 import asyncio
 import time
+from tempfile import TemporaryFile
+from typing import IO, Any
 from uuid import UUID
 from app import crud
+from app.api import deps
 from app.core.celery import celery
+from app.core.config import settings
 from app.models.hero_model import Hero
-from app.db.session import SessionLocal
+from app.db.session import SessionLocalWorker
+from app.schemas.export_schema import IExportFormatEnum, IReportEnum
+from app.utils.export import EXPORT_MEDIA_TYPES, get_arrow_schema, write_export
+from app.utils.follow_counters import (
+    flush_follow_counters as flush_follow_counters_to_db,
+    reconcile_follow_counters as reconcile_follow_counters_in_db,
+)
 from asyncer import runnify
+from app.crud.base_crud import CRUDBase
 
 
 @celery.task(name="tasks.increment")
@@ -16,7 +27,7 @@ def increment(value: int) -> int:
 
 
 async def get_hero(hero_id: UUID) -> Hero:
-    async with SessionLocal() as session:
+    async with SessionLocalWorker() as session:
         await asyncio.sleep(5)  # Add a delay of 5 seconds
         hero = await crud.hero.get(id=hero_id, db_session=session)
         return hero
@@ -26,3 +37,65 @@ async def get_hero(hero_id: UUID) -> Hero:
 def print_hero(hero_id: UUID) -> None:
     hero = runnify(get_hero)(hero_id=hero_id)
     return hero.id
+
+
+async def remove_user_in_batches(user_id: UUID) -> None:
+    async with SessionLocalWorker() as session:
+        await crud.user.remove(
+            id=user_id,
+            follows_batch_size=settings.USER_REMOVE_BATCH_SIZE,
+            db_session=session,
+        )
+
+
+@celery.task(name="tasks.remove_user")
+def remove_user(user_id: UUID) -> None:
+    runnify(remove_user_in_batches)(user_id=user_id)
+
+
+async def run_in_session(func):
+    async with SessionLocalWorker() as session:
+        return await func(session)
+
+
+@celery.task(name="tasks.flush_follow_counters")
+def flush_follow_counters() -> int:
+    return runnify(run_in_session)(flush_follow_counters_to_db)
+
+
+@celery.task(name="tasks.reconcile_follow_counters")
+def reconcile_follow_counters() -> int:
+    return runnify(run_in_session)(reconcile_follow_counters_in_db)
+
+
+def get_report_crud(report: IReportEnum) -> CRUDBase:
+    if report == IReportEnum.heroes:
+        return crud.hero
+    return crud.user
+
+
+async def write_report(
+    report: IReportEnum, file_format: IExportFormatEnum, file: IO[bytes]
+) -> int:
+    crud_base = get_report_crud(report)
+    query = crud_base.get_export_query()
+    async with SessionLocalWorker() as session:
+        batches = crud_base.stream_columns(query=query, db_session=session)
+        return await write_export(get_arrow_schema(query), batches, file, file_format)
+
+
+@celery.task(name="tasks.export_report")
+def export_report(report: str, file_format: str) -> dict[str, Any]:
+    """Renders the report into a temporary file and uploads it to the bucket"""
+    report = IReportEnum(report)
+    file_format = IExportFormatEnum(file_format)
+    with TemporaryFile() as file:
+        rows = runnify(write_report)(report=report, file_format=file_format, file=file)
+        file.seek(0)
+        # Unknown length, so MinIO uploads it as a multipart upload
+        data_file = deps.minio_auth().put_object(
+            file_data=file,
+            file_name=f"{report.value}.{file_format.value}",
+            content_type=EXPORT_MEDIA_TYPES[file_format],
+        )
+    return {"file_name": data_file.file_name, "rows": rows}
@@ -1,8 +1,10 @@
 from collections.abc import AsyncGenerator
 from typing import Callable
 from fastapi import Depends, HTTPException, status
-from app.utils.token import get_valid_tokens
+from app.utils.token import is_token_valid
+from app.utils.token_revocation import token_revocations
 from app.utils.minio_client import MinioClient
+from app.utils.user_cache import get_cached_user, user_cache
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from app.models.user_model import User
@@ -12,8 +14,8 @@ from app.core import security
 from app.core.config import settings
 from app.db.session import SessionLocal, SessionLocalCelery
 from sqlmodel.ext.asyncio.session import AsyncSession
-from app.schemas.common_schema import IMetaGeneral, TokenType
-import redis.asyncio as aioredis
+from app.schemas.common_schema import ILoadProfileEnum, IMetaGeneral, TokenType
+from app.db.redis_pool import get_redis_client
 from redis.asyncio import Redis
 
 
@@ -22,16 +24,6 @@ reusable_oauth2 = OAuth2PasswordBearer(
 )
 
 
-async def get_redis_client() -> Redis:
-    redis = await aioredis.from_url(
-        f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}",
-        max_connections=10,
-        encoding="utf8",
-        decode_responses=True,
-    )
-    return redis
-
-
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with SessionLocal() as session:
         yield session
@@ -43,7 +35,7 @@ async def get_jobs_db() -> AsyncGenerator[AsyncSession, None]:
 
 
 async def get_general_meta() -> IMetaGeneral:
-    current_roles = await crud.role.get_multi(skip=0, limit=100)
+    current_roles = await crud.role.get_multi_read_cached()
     return IMetaGeneral(roles=current_roles)
 
 
@@ -62,17 +54,28 @@ def get_current_user(required_roles: list[str] = None) -> Callable[[], User]:
                 detail="Could not validate credentials",
             )
         user_id = payload["sub"]
-        valid_access_tokens = await get_valid_tokens(
-            redis_client, user_id, TokenType.ACCESS
-        )
-        if valid_access_tokens and token not in valid_access_tokens:
+        if settings.TOKEN_STATELESS_VERIFICATION and token_revocations.is_revoked(
+            user_id, TokenType.ACCESS, payload.get("iat")
+        ):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Could not validate credentials",
             )
-        user: User = await crud.user.get(id=user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        user: User | None = await get_cached_user(
+            user_id, token, db_session=crud.user.get_db().session
+        )
+        if user is None:
+            if not settings.TOKEN_STATELESS_VERIFICATION and not await is_token_valid(
+                redis_client, user_id, token, TokenType.ACCESS
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Could not validate credentials",
+                )
+            user = await crud.user.get(id=user_id, load=ILoadProfileEnum.minimal)
+            if not user:
+                raise HTTPException(status_code=404, detail="User not found")
+            user_cache.set(user_id, token, user)
 
         if not user.is_active:
             raise HTTPException(status_code=400, detail="Inactive user")
@@ -94,11 +97,30 @@ def get_current_user(required_roles: list[str] = None) -> Callable[[], User]:
     return current_user
 
 
+_minio_client: MinioClient | None = None
+
+
 def minio_auth() -> MinioClient:
-    minio_client = MinioClient(
-        access_key=settings.MINIO_ROOT_USER,
-        secret_key=settings.MINIO_ROOT_PASSWORD,
-        bucket_name=settings.MINIO_BUCKET,
-        minio_url=settings.MINIO_URL,
-    )
-    return minio_client
+    """
+    Process wide client, created in the app lifespan or on first use in the
+    Celery workers
+    """
+    global _minio_client
+    if _minio_client is None:
+        _minio_client = MinioClient(
+            access_key=settings.MINIO_ROOT_USER,
+            secret_key=settings.MINIO_ROOT_PASSWORD,
+            bucket_name=settings.MINIO_BUCKET,
+            minio_url=settings.MINIO_URL,
+            pool_size=settings.MINIO_POOL_SIZE,
+            url_cache_ttl=settings.MINIO_URL_CACHE_SECONDS,
+            url_cache_max_size=settings.MINIO_URL_CACHE_MAX_SIZE,
+        )
+    return _minio_client
+
+
+def close_minio_client() -> None:
+    global _minio_client
+    if _minio_client is not None:
+        _minio_client.close()
+        _minio_client = None
@@ -4,9 +4,11 @@ from app.api.v1.endpoints import (
     hero,
     team,
     login,
+    media,
     role,
     group,
     cache,
+    health,
     weather,
     report,
     periodic_tasks,
@@ -19,7 +21,9 @@ api_router.include_router(user.router, prefix="/user", tags=["user"])
 api_router.include_router(group.router, prefix="/group", tags=["group"])
 api_router.include_router(team.router, prefix="/team", tags=["team"])
 api_router.include_router(hero.router, prefix="/hero", tags=["hero"])
+api_router.include_router(media.router, prefix="/media", tags=["media"])
 api_router.include_router(cache.router, prefix="/cache", tags=["cache"])
+api_router.include_router(health.router, prefix="/health", tags=["health"])
 api_router.include_router(weather.router, prefix="/weather", tags=["weather"])
 api_router.include_router(report.router, prefix="/report", tags=["report"])
 api_router.include_router(
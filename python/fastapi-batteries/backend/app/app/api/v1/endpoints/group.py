@@ -19,6 +19,7 @@ from app.schemas.response_schema import (
     IPutResponseBase,
     create_response,
 )
+from app.schemas.common_schema import ILoadProfileEnum
 from app.schemas.role_schema import IRoleEnum
 from app.utils.exceptions import (
     IdNotFoundException,
@@ -48,7 +49,7 @@ async def get_group_by_id(
     """
     Gets a group by its id
     """
-    group = await crud.group.get(id=group_id)
+    group = await crud.group.get(id=group_id, load=ILoadProfileEnum.full)
     if group:
         return create_response(data=group)
     else:
@@ -0,0 +1,63 @@
+from app.api import deps
+from app.core.password import password_service
+from app.db.engine import get_db_pool_stats
+from app.db.redis_pool import get_redis_client, get_redis_pool_stats
+from app.db.session import engine
+from app.models.user_model import User
+from app.schemas.common_schema import (
+    IDatabasePoolStats,
+    IPasswordPoolStats,
+    IRedisPoolStats,
+)
+from app.schemas.response_schema import IGetResponseBase, create_response
+from app.schemas.role_schema import IRoleEnum
+from fastapi import APIRouter, Depends
+from redis.asyncio import Redis
+
+router = APIRouter()
+
+
+@router.get("/redis_pool")
+async def get_redis_pool_status(
+    redis_client: Redis = Depends(get_redis_client),
+    current_user: User = Depends(
+        deps.get_current_user(required_roles=[IRoleEnum.admin])
+    ),
+) -> IGetResponseBase[IRedisPoolStats]:
+    """
+    Gets the connection usage of this worker's shared Redis pool
+
+    Required roles:
+    - admin
+    """
+    return create_response(data=get_redis_pool_stats(redis_client))
+
+
+@router.get("/db_pool")
+async def get_db_pool_status(
+    current_user: User = Depends(
+        deps.get_current_user(required_roles=[IRoleEnum.admin])
+    ),
+) -> IGetResponseBase[IDatabasePoolStats]:
+    """
+    Gets the connection usage and checkout waits of this worker's database pool
+
+    Required roles:
+    - admin
+    """
+    return create_response(data=get_db_pool_stats(engine))
+
+
+@router.get("/password_pool")
+async def get_password_pool_status(
+    current_user: User = Depends(
+        deps.get_current_user(required_roles=[IRoleEnum.admin])
+    ),
+) -> IGetResponseBase[IPasswordPoolStats]:
+    """
+    Gets the usage of this worker's password hashing thread pool
+
+    Required roles:
+    - admin
+    """
+    return create_response(data=password_service.get_stats())
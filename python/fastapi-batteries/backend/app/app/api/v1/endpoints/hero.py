@@ -1,13 +1,19 @@
 from uuid import UUID
 from app.api.celery_task import print_hero
 from app.utils.exceptions import IdNotFoundException, NameNotFoundException
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from fastapi_pagination import Params
 from app import crud
 from app.api import deps
+from app.core.config import settings
 from app.models.hero_model import Hero
 from app.models.user_model import User
-from app.schemas.common_schema import IOrderEnum
+from app.schemas.bulk_schema import IBulkRead
+from app.schemas.common_schema import (
+    ICountStrategyEnum,
+    ILoadProfileEnum,
+    IOrderEnum,
+)
 from app.schemas.hero_schema import (
     IHeroCreate,
     IHeroRead,
@@ -15,8 +21,10 @@ from app.schemas.hero_schema import (
     IHeroUpdate,
 )
 from app.schemas.response_schema import (
+    ICursorParams,
     IDeleteResponseBase,
     IGetResponseBase,
+    IGetResponseCursorPaginated,
     IGetResponsePaginated,
     IPostResponseBase,
     IPutResponseBase,
@@ -36,7 +44,32 @@ async def get_hero_list(
     """
     Gets a paginated list of heroes
     """
-    heroes = await crud.hero.get_multi_paginated(params=params)
+    heroes = await crud.hero.get_multi_paginated(
+        params=params,
+        count_strategy=ICountStrategyEnum.cached,
+        load=ILoadProfileEnum.list,
+    )
+    return create_response(data=heroes)
+
+
+@router.get("/cursor")
+async def get_hero_list_by_cursor(
+    order: IOrderEnum
+    | None = Query(
+        default=IOrderEnum.ascendent, description="It is optional. Default is ascendent"
+    ),
+    params: ICursorParams = Depends(),
+    current_user: User = Depends(deps.get_current_user()),
+) -> IGetResponseCursorPaginated[IHeroReadWithTeam]:
+    """
+    Gets a cursor paginated list of heroes ordered by creation (uuid7 id)
+    """
+    heroes = await crud.hero.get_multi_cursor_paginated(
+        params=params,
+        order=order,
+        count_strategy=ICountStrategyEnum.cached,
+        load=ILoadProfileEnum.list,
+    )
     return create_response(data=heroes)
 
 
@@ -52,7 +85,12 @@ async def get_hero_list_order_by_created_at(
     """
     Gets a paginated list of heroes ordered by created at datetime
     """
-    heroes = await crud.hero.get_multi_paginated_ordered(params=params, order=order)
+    heroes = await crud.hero.get_multi_paginated_ordered(
+        params=params,
+        order=order,
+        count_strategy=ICountStrategyEnum.cached,
+        load=ILoadProfileEnum.list,
+    )
     return create_response(data=heroes)
 
 
@@ -64,7 +102,7 @@ async def get_hero_by_id(
     """
     Gets a hero by its id
     """
-    hero = await crud.hero.get(id=hero_id)
+    hero = await crud.hero.get(id=hero_id, load=ILoadProfileEnum.full)
     if not hero:
         raise IdNotFoundException(Hero, hero_id)
 
@@ -80,7 +118,9 @@ async def get_hero_by_name(
     """
     Gets a hero by his/her name
     """
-    heroes = await crud.hero.get_heroe_by_name(name=hero_name)
+    heroes = await crud.hero.get_heroe_by_name(
+        name=hero_name, load=ILoadProfileEnum.list
+    )
     if not heroes:
         raise NameNotFoundException(Hero, hero_name)
 
@@ -105,6 +145,24 @@ async def create_hero(
     return create_response(data=heroe)
 
 
+@router.post("/bulk")
+async def create_heroes(
+    heroes: list[IHeroCreate] = Body(..., max_items=settings.BULK_MAX_ITEMS),
+    current_user: User = Depends(
+        deps.get_current_user(required_roles=[IRoleEnum.admin, IRoleEnum.manager])
+    ),
+) -> IPostResponseBase[IBulkRead[IHeroRead]]:
+    """
+    Creates many heroes, rows that can not be inserted are reported in errors
+
+    Required roles:
+    - admin
+    - manager
+    """
+    result = await crud.hero.create_multi(obj_in=heroes, created_by_id=current_user.id)
+    return create_response(data=result)
+
+
 @router.put("/{hero_id}")
 async def update_hero(
     hero_id: UUID,
@@ -1,11 +1,10 @@
 from datetime import timedelta
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from redis.asyncio import Redis
-from app.utils.token import get_valid_tokens
 from app.utils.token import delete_tokens
-from app.utils.token import add_token_to_redis
-from app.core.security import get_password_hash
-from app.core.security import verify_password
+from app.utils.token import add_token_to_redis, add_tokens_to_redis, is_token_valid
+from app.utils.user_cache import invalidate_user
+from app.core.password import password_service
 from app.models.user_model import User
 from app.api.deps import get_redis_client
 from fastapi.security import OAuth2PasswordRequestForm
@@ -16,7 +15,7 @@ from app import crud
 from app.api import deps
 from app.core import security
 from app.core.config import settings
-from app.schemas.common_schema import TokenType, IMetaGeneral
+from app.schemas.common_schema import ILoadProfileEnum, TokenType, IMetaGeneral
 from app.schemas.token_schema import TokenRead, Token, RefreshToken
 from app.schemas.response_schema import IPostResponseBase, create_response
 
@@ -27,53 +26,52 @@ router = APIRouter()
 async def login(
     email: EmailStr = Body(...),
     password: str = Body(...),
+    include_user: bool = Query(
+        True,
+        description=(
+            "Set to false to skip loading the user, which is faster. The tokens are"
+            " returned with user set to null"
+        ),
+    ),
     meta_data: IMetaGeneral = Depends(deps.get_general_meta),
     redis_client: Redis = Depends(get_redis_client),
 ) -> IPostResponseBase[Token]:
     """
     Login for all users
     """
-    user = await crud.user.authenticate(email=email, password=password)
-    if not user:
+    credentials = await crud.user.authenticate_credentials(
+        email=email, password=password
+    )
+    if not credentials:
         raise HTTPException(status_code=400, detail="Email or Password incorrect")
-    elif not user.is_active:
+    elif not credentials.is_active:
         raise HTTPException(status_code=400, detail="User is inactive")
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     refresh_token_expires = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
-        user.id, expires_delta=access_token_expires
+        credentials.id, expires_delta=access_token_expires
     )
     refresh_token = security.create_refresh_token(
-        user.id, expires_delta=refresh_token_expires
+        credentials.id, expires_delta=refresh_token_expires
     )
+    user = None
+    if include_user:
+        user = await crud.user.get(id=credentials.id, load=ILoadProfileEnum.full)
     data = Token(
         access_token=access_token,
         token_type="bearer",
         refresh_token=refresh_token,
         user=user,
     )
-    valid_access_tokens = await get_valid_tokens(
-        redis_client, user.id, TokenType.ACCESS
-    )
-    if valid_access_tokens:
-        await add_token_to_redis(
-            redis_client,
-            user,
-            access_token,
-            TokenType.ACCESS,
-            settings.ACCESS_TOKEN_EXPIRE_MINUTES,
-        )
-    valid_refresh_tokens = await get_valid_tokens(
-        redis_client, user.id, TokenType.REFRESH
+    await add_tokens_to_redis(
+        redis_client,
+        credentials.id,
+        [
+            (access_token, TokenType.ACCESS, settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+            (refresh_token, TokenType.REFRESH, settings.REFRESH_TOKEN_EXPIRE_MINUTES),
+        ],
+        only_if_tracked=True,
     )
-    if valid_refresh_tokens:
-        await add_token_to_redis(
-            redis_client,
-            user,
-            refresh_token,
-            TokenType.REFRESH,
-            settings.REFRESH_TOKEN_EXPIRE_MINUTES,
-        )
 
     return create_response(meta=meta_data, data=data, message="Login correctly")
 
@@ -89,20 +87,29 @@ async def change_password(
     Change password
     """
 
-    if not verify_password(current_password, current_user.hashed_password):
+    if not await password_service.verify(
+        current_password, current_user.hashed_password
+    ):
         raise HTTPException(status_code=400, detail="Invalid Current Password")
 
-    if verify_password(new_password, current_user.hashed_password):
+    if await password_service.verify(new_password, current_user.hashed_password):
         raise HTTPException(
             status_code=400,
             detail="New Password should be different that the current one",
         )
 
-    new_hashed_password = get_password_hash(new_password)
+    new_hashed_password = await password_service.hash(new_password)
     await crud.user.update(
         obj_current=current_user, obj_new={"hashed_password": new_hashed_password}
     )
 
+    # Revoked before the new tokens are issued, the stateless mode rejects every
+    # token issued up to the revocation time
+    await delete_tokens(redis_client, current_user, TokenType.ACCESS)
+    await delete_tokens(redis_client, current_user, TokenType.REFRESH)
+    # Evict again so no request re-cached the user with an old token in between
+    await invalidate_user(current_user.id)
+
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     refresh_token_expires = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
@@ -115,24 +122,15 @@ async def change_password(
         access_token=access_token,
         token_type="bearer",
         refresh_token=refresh_token,
-        user=current_user,
+        user=await crud.user.get(id=current_user.id, load=ILoadProfileEnum.full),
     )
-
-    await delete_tokens(redis_client, current_user, TokenType.ACCESS)
-    await delete_tokens(redis_client, current_user, TokenType.REFRESH)
-    await add_token_to_redis(
+    await add_tokens_to_redis(
         redis_client,
-        current_user,
-        access_token,
-        TokenType.ACCESS,
-        settings.ACCESS_TOKEN_EXPIRE_MINUTES,
-    )
-    await add_token_to_redis(
-        redis_client,
-        current_user,
-        refresh_token,
-        TokenType.REFRESH,
-        settings.REFRESH_TOKEN_EXPIRE_MINUTES,
+        current_user.id,
+        [
+            (access_token, TokenType.ACCESS, settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+            (refresh_token, TokenType.REFRESH, settings.REFRESH_TOKEN_EXPIRE_MINUTES),
+        ],
     )
 
     return create_response(data=data, message="New password generated")
@@ -155,29 +153,25 @@ async def get_new_access_token(
 
     if payload["type"] == "refresh":
         user_id = payload["sub"]
-        valid_refresh_tokens = await get_valid_tokens(
-            redis_client, user_id, TokenType.REFRESH
-        )
-        if valid_refresh_tokens and body.refresh_token not in valid_refresh_tokens:
+        if not await is_token_valid(
+            redis_client, user_id, body.refresh_token, TokenType.REFRESH
+        ):
             raise HTTPException(status_code=403, detail="Refresh token invalid")
 
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        user = await crud.user.get(id=user_id)
+        user = await crud.user.get(id=user_id, load=ILoadProfileEnum.minimal)
         if getattr(user, "is_active"):
             access_token = security.create_access_token(
                 payload["sub"], expires_delta=access_token_expires
             )
-            valid_access_get_valid_tokens = await get_valid_tokens(
-                redis_client, user.id, TokenType.ACCESS
+            await add_token_to_redis(
+                redis_client,
+                user.id,
+                access_token,
+                TokenType.ACCESS,
+                settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+                only_if_tracked=True,
             )
-            if valid_access_get_valid_tokens:
-                await add_token_to_redis(
-                    redis_client,
-                    user,
-                    access_token,
-                    TokenType.ACCESS,
-                    settings.ACCESS_TOKEN_EXPIRE_MINUTES,
-                )
             return create_response(
                 data=TokenRead(access_token=access_token, token_type="bearer"),
                 message="Access token generated correctly",
@@ -196,26 +190,23 @@ async def login_access_token(
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = await crud.user.authenticate(
+    credentials = await crud.user.authenticate_credentials(
         email=form_data.username, password=form_data.password
     )
-    if not user:
+    if not credentials:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
-    elif not user.is_active:
+    elif not credentials.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
-        user.id, expires_delta=access_token_expires
+        credentials.id, expires_delta=access_token_expires
     )
-    valid_access_tokens = await get_valid_tokens(
-        redis_client, user.id, TokenType.ACCESS
+    await add_token_to_redis(
+        redis_client,
+        credentials.id,
+        access_token,
+        TokenType.ACCESS,
+        settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+        only_if_tracked=True,
     )
-    if valid_access_tokens:
-        await add_token_to_redis(
-            redis_client,
-            user,
-            access_token,
-            TokenType.ACCESS,
-            settings.ACCESS_TOKEN_EXPIRE_MINUTES,
-        )
     return TokenRead(access_token=access_token, token_type="bearer")
@@ -0,0 +1,62 @@
+from pathlib import PurePath
+from uuid import UUID
+from app.utils.exceptions import IdNotFoundException
+from fastapi import APIRouter, Body, Depends, File, UploadFile, status
+from app import crud
+from app.api import deps
+from app.core.config import settings
+from app.models.media_model import Media
+from app.models.user_model import User
+from app.schemas.media_schema import IMediaCreate, IMediaRead
+from app.schemas.response_schema import (
+    IGetResponseBase,
+    IPostResponseBase,
+    create_response,
+)
+from app.utils.minio_client import MinioClient
+from app.utils.upload import inspect_upload
+
+
+router = APIRouter()
+
+
+@router.get("/{media_id}")
+async def get_media_by_id(
+    media_id: UUID,
+    current_user: User = Depends(deps.get_current_user()),
+) -> IGetResponseBase[IMediaRead]:
+    """
+    Gets a media by its id
+    """
+    media = await crud.media.get(id=media_id)
+    if not media:
+        raise IdNotFoundException(Media, id=media_id)
+    return create_response(data=media)
+
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def upload_media(
+    title: str | None = Body(None),
+    description: str | None = Body(None),
+    media_file: UploadFile = File(...),
+    current_user: User = Depends(deps.get_current_user()),
+    minio_client: MinioClient = Depends(deps.minio_auth),
+) -> IPostResponseBase[IMediaRead]:
+    """
+    Uploads a file of any type as it is, without decoding it. The file is streamed
+    to the bucket in UPLOAD_PART_SIZE parts and stored with its sniffed content type.
+    """
+    content_type, size = await inspect_upload(media_file, settings.MEDIA_MAX_SIZE)
+    data_file = await minio_client.put_object_async(
+        file_data=media_file.file,
+        file_name=PurePath(media_file.filename or "file").name,
+        content_type=content_type,
+        length=size,
+        part_size=settings.UPLOAD_PART_SIZE,
+    )
+    media = await crud.media.create(
+        obj_in=IMediaCreate(
+            title=title, description=description, path=data_file.file_name
+        )
+    )
+    return create_response(data=media)
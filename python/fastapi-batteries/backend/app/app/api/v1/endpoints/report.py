@@ -1,19 +1,32 @@
-from typing import Annotated
+from collections.abc import AsyncIterator
+from typing import Annotated, Any
 from app import crud
+from app.crud.base_crud import CRUDBase
 from app.api import deps
-from app.schemas.hero_schema import (
-    IHeroRead,
-)
+from app.api.celery_task import export_report
+from app.core.celery import celery
+from app.core.config import settings
+from app.db.session import SessionLocal
 from app.models import User
+from app.schemas.export_schema import (
+    IExportFormatEnum,
+    IExportJobCreate,
+    IExportJobRead,
+)
+from app.schemas.response_schema import (
+    IGetResponseBase,
+    IPostResponseBase,
+    create_response,
+)
+from app.utils.minio_client import MinioClient
+from asyncer import asyncify
+from celery.result import AsyncResult
 from fastapi import APIRouter, Depends, Query
 from app.schemas.role_schema import IRoleEnum
-from app.schemas.user_schema import (
-    IUserRead,
-)
-import pandas as pd
+from app.utils.export import EXPORT_MEDIA_TYPES, get_arrow_schema, iter_export
 from fastapi.responses import StreamingResponse
 from enum import Enum
-from io import BytesIO, StringIO
+from sqlmodel.sql.expression import Select
 
 router = APIRouter()
 
@@ -23,6 +36,34 @@ class FileExtensionEnum(str, Enum):
     xls = "xls"
 
 
+async def stream_report(
+    crud_base: CRUDBase, query: Select, file_format: IExportFormatEnum
+) -> AsyncIterator[bytes]:
+    # The request session is closed once the response starts, use a dedicated one
+    async with SessionLocal() as session:
+        batches = crud_base.stream_columns(query=query, db_session=session)
+        async for data in iter_export(get_arrow_schema(query), batches, file_format):
+            yield data
+
+
+def get_export_response(
+    crud_base: CRUDBase, file_extension: FileExtensionEnum, name: str
+) -> StreamingResponse:
+    if file_extension == FileExtensionEnum.xls:
+        file_format = IExportFormatEnum.xlsx
+    else:
+        file_format = IExportFormatEnum.csv
+
+    return StreamingResponse(
+        stream_report(crud_base, crud_base.get_export_query(), file_format),
+        media_type=EXPORT_MEDIA_TYPES[file_format],
+        headers={
+            "Content-Disposition": f"attachment;filename={name}.{file_format.value}",
+            "Access-Control-Expose-Headers": "Content-Disposition",
+        },
+    )
+
+
 @router.get("/users_list")
 async def export_users_list(
     file_extension: Annotated[
@@ -36,38 +77,12 @@ async def export_users_list(
     ),
 ) -> StreamingResponse:
     """
-    Export users list in a csv/xlsx file
+    Export users list in a csv/xlsx file, rows are streamed as they are fetched
 
     Required roles:
     - admin
     """
-    users = await crud.user.get_multi_ordered(limit=1000, order_by="id")
-    users_list = [
-        IUserRead.from_orm(user) for user in users
-    ]  # Creates a pydantic list of object
-    users_df = pd.DataFrame([s.__dict__ for s in users_list])
-    if file_extension == FileExtensionEnum.xls:
-        stream = BytesIO()
-        with pd.ExcelWriter(stream) as writer:
-            users_df.to_excel(writer, index=False)
-        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        filename = "users.xlsx"
-    else:
-        stream = StringIO()
-        users_df.to_csv(stream, index=False)
-        media_type = "text/csv"
-        filename = "users.csv"
-
-    response = StreamingResponse(
-        iter([stream.getvalue()]),
-        media_type=media_type,
-        headers={
-            "Content-Disposition": f"attachment;filename={filename}",
-            "Access-Control-Expose-Headers": "Content-Disposition",
-        },
-    )
-
-    return response
+    return get_export_response(crud.user, file_extension, "users")
 
 
 @router.get("/heroes_list")
@@ -81,35 +96,58 @@ async def export_heroes_list(
     ),
 ) -> StreamingResponse:
     """
-    Export heroes list in a csv/xlsx file
+    Export heroes list in a csv/xlsx file, rows are streamed as they are fetched
 
     Required roles:
     - admin
     """
-    heroes = await crud.hero.get_multi_ordered(limit=1000, order_by="id")
-    heroes_list = [
-        IHeroRead.from_orm(hero) for hero in heroes
-    ]  # Creates a pydantic list of object
-    heroes_df = pd.DataFrame([s.__dict__ for s in heroes_list])
-    if file_extension == FileExtensionEnum.xls:
-        stream = BytesIO()
-        with pd.ExcelWriter(stream) as writer:
-            heroes_df.to_excel(writer, index=False)
-        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        filename = "heroes.xlsx"
-    else:
-        stream = StringIO()
-        heroes_df.to_csv(stream, index=False)
-        media_type = "text/csv"
-        filename = "heroes.csv"
-
-    response = StreamingResponse(
-        iter([stream.getvalue()]),
-        media_type=media_type,
-        headers={
-            "Content-Disposition": f"attachment;filename={filename}",
-            "Access-Control-Expose-Headers": "Content-Disposition",
-        },
-    )
+    return get_export_response(crud.hero, file_extension, "heroes")
+
+
+def get_job_result(job_id: str) -> tuple[str, Any]:
+    result = AsyncResult(job_id, app=celery)
+    return result.state, result.result
+
 
-    return response
+@router.post("/export_jobs")
+async def create_export_job(
+    export_job: IExportJobCreate,
+    current_user: User = Depends(
+        deps.get_current_user(required_roles=[IRoleEnum.admin])
+    ),
+) -> IPostResponseBase[IExportJobRead]:
+    """
+    Renders a report in a celery worker, poll the returned job to get the file
+
+    Required roles:
+    - admin
+    """
+    task = export_report.delay(export_job.report, export_job.file_format)
+    return create_response(data=IExportJobRead(id=task.id, status=task.state))
+
+
+@router.get("/export_jobs/{job_id}")
+async def get_export_job(
+    job_id: str,
+    current_user: User = Depends(
+        deps.get_current_user(required_roles=[IRoleEnum.admin])
+    ),
+    minio_client: MinioClient = Depends(deps.minio_auth),
+) -> IGetResponseBase[IExportJobRead]:
+    """
+    Gets the status of an export job and, once it is done, a download url
+
+    Required roles:
+    - admin
+    """
+    state, result = await asyncify(get_job_result)(job_id)
+    export_job = IExportJobRead(id=job_id, status=state)
+    if state == "SUCCESS":
+        export_job.file_name = result["file_name"]
+        export_job.rows = result["rows"]
+        export_job.url = minio_client.presigned_get_object(
+            bucket_name=settings.MINIO_BUCKET, object_name=result["file_name"]
+        )
+    elif state == "FAILURE":
+        export_job.error = str(result)
+    return create_response(data=export_job)
@@ -1,8 +1,13 @@
 from io import BytesIO
+from pathlib import PurePath
 from typing import Annotated
 from uuid import UUID
+from app.core.config import settings
 from app.utils.exceptions import (
     IdNotFoundException,
+    ImageTooLargeException,
+    InvalidImageException,
+    UnsupportedMediaTypeException,
     SelfFollowedException,
     UserFollowedException,
     UserNotFollowedException,
@@ -10,11 +15,14 @@ from app.utils.exceptions import (
 )
 from app import crud
 from app.api import deps
+from app.api.celery_task import remove_user as remove_user_task
 from app.deps import user_deps
 from app.models import User, UserFollow
 from app.models.role_model import Role
 from app.utils.minio_client import MinioClient
-from app.utils.resize_image import modify_image
+from app.utils.resize_image import ImageTooLargeError, render_image_in_pool
+from app.utils.search import FULL_NAME_SEPARATOR, escape_like, trigram_match
+from app.utils.upload import IMAGE_CONTENT_TYPES, inspect_upload
 from fastapi import (
     APIRouter,
     Body,
@@ -25,10 +33,19 @@ from fastapi import (
     UploadFile,
     status,
 )
+from app.schemas.bulk_schema import IBulkRead
+from app.schemas.image_media_schema import IImageRenditionCreate
 from app.schemas.media_schema import IMediaCreate
+from app.schemas.common_schema import (
+    ICountStrategyEnum,
+    ILoadProfileEnum,
+    IOrderEnum,
+)
 from app.schemas.response_schema import (
+    ICursorParams,
     IDeleteResponseBase,
     IGetResponseBase,
+    IGetResponseCursorPaginated,
     IGetResponsePaginated,
     IPostResponseBase,
     IPutResponseBase,
@@ -37,16 +54,22 @@ from app.schemas.response_schema import (
 from app.schemas.role_schema import IRoleEnum
 from app.schemas.user_follow_schema import IUserFollowRead
 from app.schemas.user_schema import (
+    IUserBulkStatusUpdate,
     IUserCreate,
     IUserRead,
     IUserReadWithoutGroups,
     IUserStatus,
+    IUserStatusRead,
 )
 from app.schemas.user_follow_schema import (
     IUserFollowReadCommon,
+    IUserFollowStatus,
+    IUserFollowStatusRequest,
+    IUserFollowSuggestionRead,
+    IUserFollowUserRead,
 )
 from fastapi_pagination import Params
-from sqlmodel import and_, select, col, or_, text
+from sqlmodel import and_, select, col
 
 router = APIRouter()
 
@@ -65,7 +88,49 @@ async def read_users_list(
     - admin
     - manager
     """
-    users = await crud.user.get_multi_paginated(params=params)
+    users = await crud.user.get_multi_paginated(
+        params=params,
+        count_strategy=ICountStrategyEnum.estimate,
+        load=ILoadProfileEnum.list,
+    )
+    return create_response(data=users)
+
+
+@router.get("/list/cursor")
+async def read_users_list_by_cursor(
+    order_by: str
+    | None = Query(
+        default="id",
+        description=(
+            "Column used as keyset, it is optional. One of id, first_name, "
+            "last_name, is_active or is_superuser"
+        ),
+    ),
+    order: IOrderEnum
+    | None = Query(
+        default=IOrderEnum.ascendent, description="It is optional. Default is ascendent"
+    ),
+    params: ICursorParams = Depends(),
+    current_user: User = Depends(
+        deps.get_current_user(required_roles=[IRoleEnum.admin, IRoleEnum.manager])
+    ),
+) -> IGetResponseCursorPaginated[IUserReadWithoutGroups]:
+    """
+    Retrieve users using cursor pagination. Requires admin or manager role
+
+    Pass the returned `next_cursor` to get the following page.
+
+    Required roles:
+    - admin
+    - manager
+    """
+    users = await crud.user.get_multi_cursor_paginated(
+        params=params,
+        order_by=order_by,
+        order=order,
+        count_strategy=ICountStrategyEnum.estimate,
+        load=ILoadProfileEnum.list,
+    )
     return create_response(data=users)
 
 
@@ -97,23 +162,45 @@ async def read_users_list_by_role_name(
         .join(Role, User.role_id == Role.id)
         .where(
             and_(
-                col(Role.name).ilike(f"%{role_name}%"),
+                col(Role.name).ilike(f"%{escape_like(role_name)}%"),
                 User.is_active == user_status,
-                or_(
-                    col(User.first_name).ilike(f"%{name}%"),
-                    col(User.last_name).ilike(f"%{name}%"),
-                    text(
-                        f"""'{name}' % concat("User".last_name, ' ', "User".first_name)"""
-                    ),
-                    text(
-                        f"""'{name}' % concat("User".first_name, ' ', "User".last_name)"""
-                    ),
-                ),
             )
         )
         .order_by(User.first_name)
     )
-    users = await crud.user.get_multi_paginated(query=query, params=params)
+    if name:
+        full_name = User.first_name + FULL_NAME_SEPARATOR + User.last_name
+        query = query.where(trigram_match(full_name, name))
+    users = await crud.user.get_multi_paginated(
+        query=query,
+        params=params,
+        count_strategy=ICountStrategyEnum.cached,
+        load=ILoadProfileEnum.list,
+    )
+    return create_response(data=users)
+
+
+@router.get("/search")
+async def search_users(
+    text: Annotated[str, Query(min_length=1, max_length=100)],
+    user_status: IUserStatus | None = None,
+    params: ICursorParams = Depends(),
+    current_user: User = Depends(
+        deps.get_current_user(required_roles=[IRoleEnum.admin, IRoleEnum.manager])
+    ),
+) -> IGetResponseCursorPaginated[IUserReadWithoutGroups]:
+    """
+    Searches users by full name, the most similar first.
+    Typos are tolerated. Pass the returned `next_cursor` to get the following page.
+
+    Required roles:
+    - admin
+    - manager
+    """
+    is_active = None if user_status is None else user_status == IUserStatus.active
+    users = await crud.user.search_paginated(
+        text=text, is_active=is_active, params=params, load=ILoadProfileEnum.list
+    )
     return create_response(data=users)
 
 
@@ -132,7 +219,10 @@ async def get_user_list_order_by_created_at(
     - manager
     """
     users = await crud.user.get_multi_paginated_ordered(
-        params=params, order_by="created_at"
+        params=params,
+        order_by="created_at",
+        count_strategy=ICountStrategyEnum.estimate,
+        load=ILoadProfileEnum.list,
     )
     return create_response(data=users)
 
@@ -161,6 +251,35 @@ async def get_following(
     return create_response(data=users)
 
 
+@router.post("/following/status")
+async def get_following_status(
+    follow_status: IUserFollowStatusRequest,
+    current_user: User = Depends(deps.get_current_user()),
+) -> IGetResponseBase[list[IUserFollowStatus]]:
+    """
+    Gets the follow status between the authenticated user and up to 200 users
+    """
+    statuses = await crud.user_follow.get_follow_status_by_target_user_ids(
+        user_id=current_user.id, target_user_ids=follow_status.target_user_ids
+    )
+    return create_response(data=statuses)
+
+
+@router.get("/following/suggestions")
+async def get_follow_suggestions(
+    params: Params = Depends(),
+    current_user: User = Depends(deps.get_current_user()),
+) -> IGetResponsePaginated[IUserFollowSuggestionRead]:
+    """
+    Suggests people followed by the people the authenticated user follows,
+    the most followed among them first.
+    """
+    users = await crud.user_follow.get_follow_suggestions_paginated(
+        user_id=current_user.id, params=params
+    )
+    return create_response(data=users)
+
+
 @router.get(
     "/following/{user_id}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -256,6 +375,22 @@ async def get_user_following_by_user_id(
     return create_response(data=users)
 
 
+@router.get("/{user_id}/mutual_followers/{other_user_id}")
+async def get_mutual_followers(
+    user_id: UUID,
+    other_user_id: UUID,
+    params: Params = Depends(),
+    current_user: User = Depends(deps.get_current_user()),
+) -> IGetResponsePaginated[IUserFollowUserRead]:
+    """
+    Lists the people following both users.
+    """
+    users = await crud.user_follow.get_mutual_followers_paginated(
+        user_id=user_id, other_user_id=other_user_id, params=params
+    )
+    return create_response(data=users)
+
+
 @router.get(
     "/{user_id}/following/{target_user_id}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -272,11 +407,11 @@ async def check_a_user_is_followed_another_user_by_id(
     if user_id == target_user_id:
         raise SelfFollowedException()
 
-    user = await crud.user.get(id=user_id)
+    user = await crud.user.get(id=user_id, load=ILoadProfileEnum.minimal)
     if not user:
         raise IdNotFoundException(User, id=user_id)
 
-    target_user = await crud.user.get(id=target_user_id)
+    target_user = await crud.user.get(id=target_user_id, load=ILoadProfileEnum.minimal)
     if not target_user:
         raise IdNotFoundException(User, id=target_user_id)
 
@@ -299,21 +434,15 @@ async def follow_a_user_by_id(
     """
     if target_user_id == current_user.id:
         raise SelfFollowedException()
-    target_user = await crud.user.get(id=target_user_id)
+    target_user = await crud.user.get(id=target_user_id, load=ILoadProfileEnum.minimal)
     if not target_user:
         raise IdNotFoundException(User, id=target_user_id)
 
-    current_follow_user = (
-        await crud.user_follow.get_follow_by_user_id_and_target_user_id(
-            user_id=current_user.id, target_user_id=target_user_id
-        )
-    )
-    if current_follow_user:
-        raise UserFollowedException(target_user_name=target_user.last_name)
-
     new_user_follow = await crud.user_follow.follow_a_user_by_target_user_id(
         user=current_user, target_user=target_user
     )
+    if not new_user_follow:
+        raise UserFollowedException(target_user_name=target_user.last_name)
     return create_response(data=new_user_follow)
 
 
@@ -327,12 +456,14 @@ async def unfollowing_a_user_by_id(
     """
     if target_user_id == current_user.id:
         raise SelfFollowedException()
-    target_user = await crud.user.get(id=target_user_id)
+    target_user = await crud.user.get(id=target_user_id, load=ILoadProfileEnum.minimal)
     if not target_user:
         raise IdNotFoundException(User, id=target_user_id)
 
-    current_follow_user = await crud.user_follow.get_follow_by_target_user_id(
-        user_id=current_user.id, target_user_id=target_user_id
+    current_follow_user = (
+        await crud.user_follow.get_follow_by_user_id_and_target_user_id(
+            user_id=current_user.id, target_user_id=target_user_id
+        )
     )
 
     if not current_follow_user:
@@ -370,7 +501,8 @@ async def get_my_data(
     """
     Gets my user profile information
     """
-    return create_response(data=current_user)
+    user = await crud.user.get(id=current_user.id, load=ILoadProfileEnum.full)
+    return create_response(data=user)
 
 
 @router.post("", status_code=status.HTTP_201_CREATED)
@@ -390,9 +522,31 @@ async def create_user(
     return create_response(data=user)
 
 
+@router.put("/bulk/status")
+async def update_users_status(
+    bulk_status: IUserBulkStatusUpdate,
+    current_user: User = Depends(
+        deps.get_current_user(required_roles=[IRoleEnum.admin])
+    ),
+) -> IPutResponseBase[IBulkRead[IUserStatusRead]]:
+    """
+    Activates or deactivates many users at once, ids that can not be updated are
+    reported in errors
+
+    Required roles:
+    - admin
+    """
+    result = await crud.user.update_multi(
+        list_ids=bulk_status.user_ids,
+        obj_new={"is_active": bulk_status.status == IUserStatus.active},
+    )
+    return create_response(data=result)
+
+
 @router.delete("/{user_id}")
 async def remove_user(
     user_id: UUID = Depends(user_deps.is_valid_user_id),
+    in_background: bool = False,
     current_user: User = Depends(
         deps.get_current_user(required_roles=[IRoleEnum.admin])
     ),
@@ -400,16 +554,79 @@ async def remove_user(
     """
     Deletes a user by his/her id
 
+    Use in_background for accounts with many follows, the removal is
+    then done by a celery worker in batches.
+
     Required roles:
     - admin
     """
     if current_user.id == user_id:
         raise UserSelfDeleteException()
 
+    if in_background:
+        user = await crud.user.get(id=user_id, load=ILoadProfileEnum.full)
+        remove_user_task.delay(user_id)
+        return create_response(data=user, message="User removal scheduled")
+
     user = await crud.user.remove(id=user_id)
     return create_response(data=user, message="User removed")
 
 
+async def save_user_image(
+    *,
+    user: User,
+    title: str | None,
+    description: str | None,
+    image_file: UploadFile,
+    minio_client: MinioClient,
+) -> User:
+    """
+    Renders the configured renditions in the image process pool, uploads them and
+    sets the largest one as the user image
+    """
+    content_type, _ = await inspect_upload(image_file, settings.IMAGE_MAX_SIZE)
+    if content_type not in IMAGE_CONTENT_TYPES:
+        raise UnsupportedMediaTypeException(content_type=content_type)
+
+    try:
+        renditions = await render_image_in_pool(await image_file.read())
+    except ImageTooLargeError:
+        raise ImageTooLargeException(max_pixels=settings.IMAGE_MAX_PIXELS)
+    except OSError:  # UnidentifiedImageError or a truncated file
+        raise InvalidImageException()
+
+    stem = PurePath(image_file.filename or "image").stem
+    uploaded = []
+    for rendition in renditions:
+        extension = rendition.file_format.lower()
+        data_file = await minio_client.put_object_async(
+            file_name=f"{stem}_{rendition.width}x{rendition.height}.{extension}",
+            file_data=BytesIO(rendition.file_data),
+            content_type=f"image/{extension}",
+            length=len(rendition.file_data),
+        )
+        uploaded.append(
+            IImageRenditionCreate(
+                media=IMediaCreate(
+                    title=title, description=description, path=data_file.file_name
+                ),
+                width=rendition.width,
+                height=rendition.height,
+                file_format=rendition.file_format,
+            )
+        )
+
+    image, *smaller = uploaded
+    return await crud.user.update_photo(
+        user=user,
+        image=image.media,
+        heigth=image.height,
+        width=image.width,
+        file_format=image.file_format,
+        renditions=smaller,
+    )
+
+
 @router.post("/image")
 async def upload_my_image(
     title: str | None = Body(None),
@@ -421,27 +638,15 @@ async def upload_my_image(
     """
     Uploads a user image
     """
-    try:
-        image_modified = modify_image(BytesIO(image_file.file.read()))
-        data_file = minio_client.put_object(
-            file_name=image_file.filename,
-            file_data=BytesIO(image_modified.file_data),
-            content_type=image_file.content_type,
-        )
-        media = IMediaCreate(
-            title=title, description=description, path=data_file.file_name
-        )
-        user = await crud.user.update_photo(
-            user=current_user,
-            image=media,
-            heigth=image_modified.height,
-            width=image_modified.width,
-            file_format=image_modified.file_format,
-        )
-        return create_response(data=user)
-    except Exception as e:
-        print(e)
-        return Response("Internal server error", status_code=500)
+    user = await save_user_image(
+        user=current_user,
+        title=title,
+        description=description,
+        image_file=image_file,
+        minio_client=minio_client,
+    )
+    user = await crud.user.get(id=user.id, load=ILoadProfileEnum.full)
+    return create_response(data=user)
 
 
 @router.post("/{user_id}/image")
@@ -461,24 +666,12 @@ async def upload_user_image(
     Required roles:
     - admin
     """
-    try:
-        image_modified = modify_image(BytesIO(image_file.file.read()))
-        data_file = minio_client.put_object(
-            file_name=image_file.filename,
-            file_data=BytesIO(image_modified.file_data),
-            content_type=image_file.content_type,
-        )
-        media = IMediaCreate(
-            title=title, description=description, path=data_file.file_name
-        )
-        user = await crud.user.update_photo(
-            user=user,
-            image=media,
-            heigth=image_modified.height,
-            width=image_modified.width,
-            file_format=image_modified.file_format,
-        )
-        return create_response(data=user)
-    except Exception as e:
-        print(e)
-        return Response("Internal server error", status_code=500)
+    user = await save_user_image(
+        user=user,
+        title=title,
+        description=description,
+        image_file=image_file,
+        minio_client=minio_client,
+    )
+    user = await crud.user.get(id=user.id, load=ILoadProfileEnum.full)
+    return create_response(data=user)
@@ -1,6 +1,7 @@
 # Celery is good for data-intensive application or some long-running tasks in other simple cases use Fastapi background tasks
 # Reference https://towardsdatascience.com/deploying-ml-models-in-production-with-fastapi-and-celery-7063e539a5db
 from celery import Celery
+from celery.schedules import crontab
 from app.core.config import settings
 
 celery = Celery(
@@ -11,4 +12,15 @@ celery = Celery(
 )
 
 celery.conf.update({"beat_dburi": settings.SYNC_CELERY_BEAT_DATABASE_URI})
+celery.conf.beat_schedule = {
+    "reconcile-follow-counters": {
+        "task": "tasks.reconcile_follow_counters",
+        "schedule": crontab(minute=0, hour=3),
+    },
+}
+if settings.FOLLOW_COUNTERS_BUFFERED:
+    celery.conf.beat_schedule["flush-follow-counters"] = {
+        "task": "tasks.flush_follow_counters",
+        "schedule": settings.FOLLOW_COUNTERS_FLUSH_SECONDS,
+    }
 celery.autodiscover_tasks()
@@ -18,6 +18,36 @@ class Settings(BaseSettings):
     PROJECT_NAME: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 1  # 1 hour
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 100  # 100 days
+    # Verify access tokens locally against the in-process revocation filter
+    # instead of checking the stored tokens in Redis on every request
+    TOKEN_STATELESS_VERIFICATION: bool = False
+    # Renders the API responses with orjson, see app.utils.fast_response
+    RESPONSE_FAST_PATH: bool = False
+    # With the fast path, serializes the ORM output without validating it
+    RESPONSE_TRUST_ORM: bool = False
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    # Operations waiting for a pending slot, the next ones are rejected with a 503
+    PASSWORD_HASH_MAX_WAITING: int = 256
+    USER_CACHE_TTL_SECONDS: int = 5
+    USER_CACHE_MAX_SIZE: int = 10_000
+    ROLES_CACHE_TTL_SECONDS: int = 300
+    COUNT_CACHE_TTL_SECONDS: int = 60
+    USER_REMOVE_BATCH_SIZE: int = 10_000
+    # Items accepted by the bulk endpoints in one request
+    BULK_MAX_ITEMS: int = 10_000
+    FOLLOW_COUNTERS_BUFFERED: bool = False
+    FOLLOW_COUNTERS_FLUSH_SECONDS: float = 10.0
+    EXPORT_CHUNK_SIZE: int = 5000
+    IMAGE_RENDITION_SIZES: list[int] = [1024, 256, 64]
+    IMAGE_RENDITION_FORMAT: str = "WEBP"  # AVIF needs pillow-avif-plugin
+    IMAGE_QUALITY: int = 80
+    IMAGE_MAX_PIXELS: int = 40_000_000
+    IMAGE_PROCESS_WORKERS: int = 2
+    IMAGE_MAX_SIZE: int = 20 * 1024 * 1024
+    MEDIA_MAX_SIZE: int = 200 * 1024 * 1024
+    UPLOAD_PART_SIZE: int = 8 * 1024 * 1024  # S3 parts are at least 5 MiB
     OPENAI_API_KEY: str
     DATABASE_USER: str
     DATABASE_PASSWORD: str
@@ -27,9 +57,29 @@ class Settings(BaseSettings):
     DATABASE_CELERY_NAME: str = "celery_schedule_jobs"
     REDIS_HOST: str
     REDIS_PORT: str
-    DB_POOL_SIZE = 83
-    WEB_CONCURRENCY = 9
-    POOL_SIZE = max(DB_POOL_SIZE // WEB_CONCURRENCY, 5)
+    REDIS_POOL_SIZE: int = 50
+    REDIS_POOL_TIMEOUT: float = 5.0  # seconds waiting for a free connection
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    # Connections the app may open on the database, split between the workers
+    DB_POOL_SIZE: int = 83
+    WEB_CONCURRENCY: int = 9
+    POOL_SIZE: int | None
+
+    @validator("POOL_SIZE", pre=True, always=True)
+    def assemble_pool_size(cls, v: int | None, values: dict[str, Any]) -> Any:
+        if v:
+            return v
+        return max(values.get("DB_POOL_SIZE") // values.get("WEB_CONCURRENCY"), 5)
+
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # seconds waiting for a free connection
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 30_000  # 0 disables it
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    # Compatibility with PgBouncer in transaction pooling mode
+    DB_PGBOUNCER: bool = False
+    DB_CELERY_POOL_SIZE: int = 2
     ASYNC_DATABASE_URI: PostgresDsn | None
 
     @validator("ASYNC_DATABASE_URI", pre=True)
@@ -45,6 +95,36 @@ class Settings(BaseSettings):
             path=f"/{values.get('DATABASE_NAME') or ''}",
         )
 
+    # Hosts ("host" or "host:port") of the read replicas of DATABASE_NAME
+    DATABASE_REPLICA_HOSTS: list[str] = []
+    ASYNC_REPLICA_DATABASE_URIS: list[str] = []
+
+    @validator("ASYNC_REPLICA_DATABASE_URIS", pre=True, always=True)
+    def assemble_replica_db_connections(
+        cls, v: list[str] | None, values: dict[str, Any]
+    ) -> Any:
+        if v:
+            return v
+        uris = []
+        for replica in values.get("DATABASE_REPLICA_HOSTS") or []:
+            host, _, port = replica.partition(":")
+            uris.append(
+                PostgresDsn.build(
+                    scheme="postgresql+asyncpg",
+                    user=values.get("DATABASE_USER"),
+                    password=values.get("DATABASE_PASSWORD"),
+                    host=host,
+                    port=port or str(values.get("DATABASE_PORT")),
+                    path=f"/{values.get('DATABASE_NAME') or ''}",
+                )
+            )
+        return uris
+
+    REPLICA_HEALTH_CHECK_INTERVAL: int = 10
+    REPLICA_HEALTH_CHECK_TIMEOUT: float = 2.0
+    # GET requests of a user go to the primary for this long after a write
+    READ_YOUR_WRITES_SECONDS: int = 5
+
     SYNC_CELERY_DATABASE_URI: str | None
 
     @validator("SYNC_CELERY_DATABASE_URI", pre=True)
@@ -103,6 +183,10 @@ class Settings(BaseSettings):
     MINIO_ROOT_PASSWORD: str
     MINIO_URL: str
     MINIO_BUCKET: str
+    MINIO_POOL_SIZE: int = 10
+    # Must stay below the 7 days the presigned urls are valid for
+    MINIO_URL_CACHE_SECONDS: int = 60 * 60 * 24 * 3
+    MINIO_URL_CACHE_MAX_SIZE: int = 10_000
 
     WHEATER_URL: AnyHttpUrl
 
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+from app.core.config import settings
+from app.core.security import pwd_context
+from app.utils.exceptions import PasswordServiceBusyException
+
+T = TypeVar("T")
+
+
+class PasswordService:
+    """
+    Runs bcrypt on a bounded thread pool. bcrypt releases the GIL while hashing, so
+    the workers hash in parallel and the event loop keeps serving other requests.
+    At most `max_pending` operations are queued or running and `max_waiting` wait
+    for a slot, the others are rejected with PasswordServiceBusyException.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, max_waiting: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_waiting = max_waiting
+        self._executor: ThreadPoolExecutor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._waiting = 0
+        self._in_flight = 0
+        self._operations = 0
+        self._rehashes = 0
+        self._rejected = 0
+        self._seconds = 0.0
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password"
+            )
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+
+        if self._semaphore.locked() and self._waiting >= self.max_waiting:
+            self._rejected += 1
+            raise PasswordServiceBusyException()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(fn, *args))
+        finally:
+            self._seconds += time.perf_counter() - start
+            self._operations += 1
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(pwd_context.verify, password, hashed_password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        """
+        Verifies the password and, when the hash was made with other settings than
+        the configured ones, returns a new hash to store in place of the old one
+        """
+        is_valid, new_hash = await self._run(
+            pwd_context.verify_and_update, password, hashed_password
+        )
+        if new_hash is not None:
+            self._rehashes += 1
+        return is_valid, new_hash
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "max_waiting": self.max_waiting,
+            "waiting": self._waiting,
+            "in_flight": self._in_flight,
+            "operations": self._operations,
+            "rehashes": self._rehashes,
+            "rejected": self._rejected,
+            "average_seconds": self._seconds / self._operations
+            if self._operations
+            else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._semaphore = None
+
+
+password_service = PasswordService(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    max_waiting=settings.PASSWORD_HASH_MAX_WAITING,
+)
@@ -5,3 +5,4 @@ from .role_crud import role
 from .group_crud import group
 from .image_media_crud import image
 from .user_follow_crud import user_follow
+from .media_crud import media
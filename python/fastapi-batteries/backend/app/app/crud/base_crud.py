@@ -1,16 +1,41 @@
+import hashlib
+from collections.abc import AsyncIterator, Sequence
 from fastapi import HTTPException
-from typing import Any, Generic, TypeVar
+from typing import TYPE_CHECKING, Any, Generic, TypeVar
 from uuid import UUID
-from app.schemas.common_schema import IOrderEnum
+from app.schemas.bulk_schema import IBulkError, IBulkRead
+from app.schemas.common_schema import ICountStrategyEnum, ILoadProfileEnum, IOrderEnum
+from app.schemas.response_schema import (
+    CursorPageBase,
+    ICursorParams,
+    IGetResponseCursorPaginated,
+)
+from app.utils.count import (
+    get_cached_count,
+    get_estimated_count,
+    get_exact_count,
+    invalidate_cached_counts,
+)
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.exceptions import InvalidOrderByException
+from app.db.replicas import get_read_session
+from fastapi_pagination.api import create_page
 from fastapi_pagination.ext.async_sqlalchemy import paginate
+from fastapi_pagination.ext.sqlalchemy import paginate_query
+from fastapi_pagination.ext.utils import unwrap_scalars
 from fastapi_async_sqlalchemy import db
 from fastapi_async_sqlalchemy.middleware import DBSessionMeta
 from fastapi_pagination import Params, Page
 from pydantic import BaseModel
-from sqlmodel import SQLModel, select, func
+from sqlmodel import SQLModel, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel.sql.expression import Select
-from sqlalchemy import exc
+from sqlalchemy import delete, exc, insert, tuple_, update
+from sqlalchemy.orm import raiseload
+from sqlalchemy.sql.expression import ColumnElement
+
+if TYPE_CHECKING:
+    import pyarrow as pa
 
 ModelType = TypeVar("ModelType", bound=SQLModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -20,6 +45,11 @@ T = TypeVar("T", bound=SQLModel)
 
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Loader options of each profile, the profiles left out use the defaults below
+    load_profiles: dict[ILoadProfileEnum, list[Any]] = {}
+    # Columns a cursor page can be ordered by, None for every not nullable column
+    cursor_order_columns: set[str] | None = None
+
     def __init__(self, model: type[ModelType]):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
@@ -33,11 +63,38 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def get_db(self) -> DBSessionMeta:
         return self.db
 
+    def get_read_session(self) -> AsyncSession:
+        """Replica session on read-only requests, the primary one otherwise"""
+        return get_read_session() or self.db.session
+
+    def get_load_options(self, load: ILoadProfileEnum | None) -> list[Any]:
+        """
+        Loader options of a loading profile. `minimal` loads only the columns and
+        raises on any relationship access, without a profile (None) the
+        relationships are loaded as set in the model.
+        """
+        if load is None:
+            return []
+        if load in self.load_profiles:
+            return self.load_profiles[load]
+        if load == ILoadProfileEnum.minimal:
+            return [raiseload("*")]
+        return []
+
+    def apply_load(self, query: Select[T], load: ILoadProfileEnum | None) -> Select[T]:
+        options = self.get_load_options(load)
+        return query.options(*options) if options else query
+
     async def get(
-        self, *, id: UUID | str, db_session: AsyncSession | None = None
+        self,
+        *,
+        id: UUID | str,
+        load: ILoadProfileEnum | None = None,
+        db_session: AsyncSession | None = None,
     ) -> ModelType | None:
-        db_session = db_session or self.db.session
+        db_session = db_session or self.get_read_session()
         query = select(self.model).where(self.model.id == id)
+        query = self.apply_load(query, load)
         response = await db_session.execute(query)
         return response.scalar_one_or_none()
 
@@ -45,22 +102,39 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         self,
         *,
         list_ids: list[UUID | str],
+        load: ILoadProfileEnum | None = None,
         db_session: AsyncSession | None = None,
     ) -> list[ModelType] | None:
-        db_session = db_session or self.db.session
-        response = await db_session.execute(
-            select(self.model).where(self.model.id.in_(list_ids))
-        )
+        db_session = db_session or self.get_read_session()
+        query = select(self.model).where(self.model.id.in_(list_ids))
+        response = await db_session.execute(self.apply_load(query, load))
         return response.scalars().all()
 
     async def get_count(
-        self, db_session: AsyncSession | None = None
-    ) -> ModelType | None:
-        db_session = db_session or self.db.session
-        response = await db_session.execute(
-            select(func.count()).select_from(select(self.model).subquery())
-        )
-        return response.scalar_one()
+        self,
+        *,
+        query: T | Select[T] | None = None,
+        count_strategy: ICountStrategyEnum | None = ICountStrategyEnum.exact,
+        db_session: AsyncSession | None = None,
+    ) -> int:
+        db_session = db_session or self.get_read_session()
+        if query is None:
+            query = select(self.model)
+        table_name = self.model.__tablename__
+        if count_strategy == ICountStrategyEnum.estimate:
+            return await get_estimated_count(db_session, query, table_name)
+        if count_strategy == ICountStrategyEnum.cached:
+            return await get_cached_count(db_session, query, table_name)
+        return await get_exact_count(db_session, query)
+
+    def get_cursor_order_columns(self) -> set[str]:
+        """Columns accepted as cursor keyset, every not nullable one by default"""
+        if self.cursor_order_columns is not None:
+            return set(self.cursor_order_columns)
+        return {c.name for c in self.model.__table__.columns if not c.nullable}
+
+    async def invalidate_count_cache(self) -> None:
+        await invalidate_cached_counts(self.model.__tablename__)
 
     async def get_multi(
         self,
@@ -68,12 +142,13 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         skip: int = 0,
         limit: int = 100,
         query: T | Select[T] | None = None,
+        load: ILoadProfileEnum | None = None,
         db_session: AsyncSession | None = None,
     ) -> list[ModelType]:
-        db_session = db_session or self.db.session
+        db_session = db_session or self.get_read_session()
         if query is None:
             query = select(self.model).offset(skip).limit(limit).order_by(self.model.id)
-        response = await db_session.execute(query)
+        response = await db_session.execute(self.apply_load(query, load))
         return response.scalars().all()
 
     async def get_multi_paginated(
@@ -81,12 +156,15 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         *,
         params: Params | None = Params(),
         query: T | Select[T] | None = None,
+        count_strategy: ICountStrategyEnum | None = ICountStrategyEnum.exact,
+        load: ILoadProfileEnum | None = None,
         db_session: AsyncSession | None = None,
     ) -> Page[ModelType]:
-        db_session = db_session or self.db.session
+        db_session = db_session or self.get_read_session()
         if query is None:
             query = select(self.model)
-        return await paginate(db_session, query, params)
+        query = self.apply_load(query, load)
+        return await self._paginate(db_session, query, params, count_strategy)
 
     async def get_multi_paginated_ordered(
         self,
@@ -95,9 +173,11 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         order_by: str | None = None,
         order: IOrderEnum | None = IOrderEnum.ascendent,
         query: T | Select[T] | None = None,
+        count_strategy: ICountStrategyEnum | None = ICountStrategyEnum.exact,
+        load: ILoadProfileEnum | None = None,
         db_session: AsyncSession | None = None,
     ) -> Page[ModelType]:
-        db_session = db_session or self.db.session
+        db_session = db_session or self.get_read_session()
 
         columns = self.model.__table__.columns
 
@@ -110,7 +190,163 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             else:
                 query = select(self.model).order_by(columns[order_by].desc())
 
-        return await paginate(db_session, query, params)
+        query = self.apply_load(query, load)
+        return await self._paginate(db_session, query, params, count_strategy)
+
+    async def _paginate(
+        self,
+        db_session: AsyncSession,
+        query: T | Select[T],
+        params: Params,
+        count_strategy: ICountStrategyEnum | None,
+    ) -> Page[ModelType]:
+        if count_strategy in (None, ICountStrategyEnum.exact):
+            return await paginate(db_session, query, params)
+        # Same as paginate but the total comes from the selected count strategy
+        total = await self.get_count(
+            query=query, count_strategy=count_strategy, db_session=db_session
+        )
+        response = await db_session.execute(paginate_query(query, params))
+        return create_page(unwrap_scalars(response.unique().all()), total, params)
+
+    async def get_multi_cursor_paginated(
+        self,
+        *,
+        params: ICursorParams | None = ICursorParams(),
+        order_by: str | ColumnElement | None = None,
+        order: IOrderEnum | None = IOrderEnum.ascendent,
+        query: T | Select[T] | None = None,
+        count_strategy: ICountStrategyEnum | None = ICountStrategyEnum.exact,
+        load: ILoadProfileEnum | None = None,
+        db_session: AsyncSession | None = None,
+    ) -> IGetResponseCursorPaginated[ModelType]:
+        """
+        Keyset pagination: seeks past the (order_by, id) pair encoded in the cursor
+        instead of using OFFSET, so every page costs the same. The id is a uuid7,
+        which makes it a time ordered tiebreaker. `order_by` is a column name of
+        `cursor_order_columns` or a SQL expression such as a relevance score, it
+        must not be nullable: NULL never compares greater than the cursor. A cursor
+        only continues the ordering and direction of the page that returned it.
+        """
+        db_session = db_session or self.get_read_session()
+
+        columns = self.model.__table__.columns
+
+        if isinstance(order_by, ColumnElement):
+            keyset = [order_by, columns["id"]]
+            # Same key for the same expression whatever its bound values
+            order_key = hashlib.sha1(str(order_by).encode()).hexdigest()[:12]
+        elif order_by is None or order_by == "id":
+            keyset = [columns["id"]]
+            order_key = "id"
+        elif order_by in self.get_cursor_order_columns():
+            keyset = [columns[order_by], columns["id"]]
+            order_key = order_by
+        else:
+            raise InvalidOrderByException(order_by)
+        direction = "asc" if order == IOrderEnum.ascendent else "desc"
+
+        if query is None:
+            query = select(self.model)
+        query = self.apply_load(query, load)
+        descriptions = query.column_descriptions
+        single_entity = len(descriptions) == 1 and descriptions[0]["type"] is self.model
+
+        total = None
+        if params.include_total:
+            total = await self.get_count(
+                query=query, count_strategy=count_strategy, db_session=db_session
+            )
+
+        if params.cursor:
+            last_value, last_id = decode_cursor(params.cursor, order_key, direction)
+            last_keys = (last_id,) if len(keyset) == 1 else (last_value, last_id)
+            if order == IOrderEnum.ascendent:
+                query = query.where(tuple_(*keyset) > last_keys)
+            else:
+                query = query.where(tuple_(*keyset) < last_keys)
+
+        if order == IOrderEnum.ascendent:
+            query = query.order_by(None).order_by(*[c.asc() for c in keyset])
+        else:
+            query = query.order_by(None).order_by(*[c.desc() for c in keyset])
+
+        # The keyset is selected too so the next cursor can be built from any query
+        query = query.add_columns(
+            keyset[0].label("cursor_value"), columns["id"].label("cursor_id")
+        )
+        response = await db_session.execute(query.limit(params.size + 1))
+        rows = response.all()
+
+        next_cursor = None
+        if len(rows) > params.size:
+            rows = rows[: params.size]
+            next_cursor = encode_cursor(
+                rows[-1].cursor_value, rows[-1].cursor_id, order_key, direction
+            )
+
+        return IGetResponseCursorPaginated(
+            data=CursorPageBase(
+                items=[row[0] for row in rows] if single_entity else rows,
+                size=params.size,
+                total=total,
+                next_cursor=next_cursor,
+            )
+        )
+
+    def get_columns_query(
+        self, columns: Sequence[str | ColumnElement] | None = None
+    ) -> Select:
+        """Selects `columns`, given by name or as expressions, ordered by id"""
+        table_columns = self.model.__table__.columns
+        if columns is None:
+            columns = list(table_columns)
+        selected = [table_columns[c] if isinstance(c, str) else c for c in columns]
+        return select(*selected).order_by(table_columns["id"])
+
+    async def get_columns(
+        self,
+        *,
+        columns: Sequence[str | ColumnElement] | None = None,
+        query: Select | None = None,
+        skip: int = 0,
+        limit: int | None = None,
+        db_session: AsyncSession | None = None,
+    ) -> "pa.Table":
+        """
+        Column oriented read: fetches plain tuples instead of ORM objects and builds
+        an Arrow table in one go. Call `.to_pandas()` on it to get a DataFrame.
+        """
+        # Only the report paths need pyarrow, it is not imported with the CRUD classes
+        import pyarrow as pa
+        from app.utils.export import get_arrow_schema, rows_to_record_batch
+
+        db_session = db_session or self.get_read_session()
+        if query is None:
+            query = self.get_columns_query(columns)
+        query = query.offset(skip).limit(limit)
+        schema = get_arrow_schema(query)
+        response = await db_session.execute(query)
+        batch = rows_to_record_batch(schema, response.all())
+        return pa.Table.from_batches([batch], schema=schema)
+
+    async def stream_columns(
+        self,
+        *,
+        columns: Sequence[str | ColumnElement] | None = None,
+        query: Select | None = None,
+        chunk_size: int | None = None,
+        db_session: AsyncSession | None = None,
+    ) -> AsyncIterator["pa.RecordBatch"]:
+        """Same as get_columns but yields one Arrow batch per server side cursor chunk"""
+        from app.utils.export import get_arrow_schema, rows_to_record_batch, stream_rows
+
+        db_session = db_session or self.get_read_session()
+        if query is None:
+            query = self.get_columns_query(columns)
+        schema = get_arrow_schema(query)
+        async for rows in stream_rows(db_session, query, chunk_size):
+            yield rows_to_record_batch(schema, rows)
 
     async def get_multi_ordered(
         self,
@@ -119,9 +355,10 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         limit: int = 100,
         order_by: str | None = None,
         order: IOrderEnum | None = IOrderEnum.ascendent,
+        load: ILoadProfileEnum | None = None,
         db_session: AsyncSession | None = None,
     ) -> list[ModelType]:
-        db_session = db_session or self.db.session
+        db_session = db_session or self.get_read_session()
 
         columns = self.model.__table__.columns
 
@@ -143,7 +380,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 .order_by(columns[order_by].desc())
             )
 
-        response = await db_session.execute(query)
+        response = await db_session.execute(self.apply_load(query, load))
         return response.scalars().all()
 
     async def create(
@@ -169,8 +406,70 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 detail="Resource already exists",
             )
         await db_session.refresh(db_obj)
+        await self.invalidate_count_cache()
         return db_obj
 
+    async def create_multi(
+        self,
+        *,
+        obj_in: list[CreateSchemaType | ModelType],
+        created_by_id: UUID | str | None = None,
+        chunk_size: int = 500,
+        db_session: AsyncSession | None = None,
+    ) -> IBulkRead[ModelType]:
+        """
+        Inserts the objects with one INSERT ... RETURNING and one commit per chunk.
+        If a chunk violates a constraint its rows are retried one by one inside
+        savepoints, so the valid rows are kept and every failing row is reported.
+        """
+        db_session = db_session or self.db.session
+        table = self.model.__table__
+        rows = []
+        for obj in obj_in:
+            db_obj = self.model.from_orm(obj)  # type: ignore
+            if created_by_id:
+                db_obj.created_by_id = created_by_id
+            rows.append({c.name: getattr(db_obj, c.name, None) for c in table.columns})
+
+        # Let the database fill server defaults nobody provided a value for
+        for column in table.columns:
+            if column.server_default is not None and all(
+                row[column.name] is None for row in rows
+            ):
+                for row in rows:
+                    del row[column.name]
+
+        result = IBulkRead(items=[], errors=[])
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start : start + chunk_size]
+            try:
+                async with db_session.begin_nested():
+                    response = await db_session.execute(
+                        select(self.model).from_statement(
+                            insert(table).values(chunk).returning(*table.columns)
+                        )
+                    )
+                    result.items.extend(response.scalars().all())
+            except exc.IntegrityError:
+                for index, row in enumerate(chunk, start=start):
+                    try:
+                        async with db_session.begin_nested():
+                            response = await db_session.execute(
+                                select(self.model).from_statement(
+                                    insert(table).values(row).returning(*table.columns)
+                                )
+                            )
+                            result.items.append(response.scalar_one())
+                    except exc.IntegrityError as e:
+                        result.errors.append(
+                            IBulkError(index=index, detail=str(e.orig))
+                        )
+            await db_session.commit()
+
+        if result.items:
+            await self.invalidate_count_cache()
+        return result
+
     async def update(
         self,
         *,
@@ -192,8 +491,95 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_session.add(obj_current)
         await db_session.commit()
         await db_session.refresh(obj_current)
+        if update_data:
+            # The cached counts may filter on the updated columns
+            await self.invalidate_count_cache()
         return obj_current
 
+    async def update_multi(
+        self,
+        *,
+        list_ids: list[UUID | str],
+        obj_new: UpdateSchemaType | dict[str, Any],
+        chunk_size: int = 500,
+        db_session: AsyncSession | None = None,
+    ) -> IBulkRead[ModelType]:
+        """
+        Applies the same changes to every id with one UPDATE ... RETURNING and one
+        commit per chunk. Like in create_multi, a chunk that violates a constraint
+        is retried id by id inside savepoints. Ids that do not exist and failing
+        ids are reported by their index in `list_ids`.
+        """
+        db_session = db_session or self.db.session
+        table = self.model.__table__
+
+        if isinstance(obj_new, dict):
+            update_data = obj_new
+        else:
+            update_data = obj_new.dict(exclude_unset=True)
+
+        def get_statement(ids: list[UUID | str]):
+            return (
+                select(self.model)
+                .from_statement(
+                    update(table)
+                    .where(table.c.id.in_(ids))
+                    .values(**update_data)
+                    .returning(*table.columns)
+                )
+                .execution_options(populate_existing=True)
+            )
+
+        result = IBulkRead(items=[], errors=[])
+        failed: dict[int, str] = {}
+        for start in range(0, len(list_ids), chunk_size):
+            chunk = list_ids[start : start + chunk_size]
+            try:
+                async with db_session.begin_nested():
+                    response = await db_session.execute(get_statement(chunk))
+                    result.items.extend(response.scalars().all())
+            except exc.IntegrityError:
+                for index, id in enumerate(chunk, start=start):
+                    try:
+                        async with db_session.begin_nested():
+                            response = await db_session.execute(get_statement([id]))
+                            result.items.extend(response.scalars().all())
+                    except exc.IntegrityError as e:
+                        failed[index] = str(e.orig)
+            await db_session.commit()
+
+        updated_ids = {str(obj.id) for obj in result.items}
+        for index, id in enumerate(list_ids):
+            if index in failed:
+                result.errors.append(IBulkError(index=index, detail=failed[index]))
+            elif str(id) not in updated_ids:
+                result.errors.append(IBulkError(index=index, detail="Not found"))
+        if result.items:
+            await self.invalidate_count_cache()
+        return result
+
+    async def remove_multi(
+        self,
+        *,
+        list_ids: list[UUID | str],
+        db_session: AsyncSession | None = None,
+    ) -> list[ModelType]:
+        """Deletes every id with one DELETE ... RETURNING"""
+        db_session = db_session or self.db.session
+        table = self.model.__table__
+        response = await db_session.execute(
+            select(self.model).from_statement(
+                delete(table).where(table.c.id.in_(list_ids)).returning(*table.columns)
+            )
+        )
+        objs = response.scalars().all()
+        for obj in objs:
+            db_session.expunge(obj)
+        await db_session.commit()
+        if objs:
+            await self.invalidate_count_cache()
+        return objs
+
     async def remove(
         self, *, id: UUID | str, db_session: AsyncSession | None = None
     ) -> ModelType:
@@ -204,4 +590,5 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj = response.scalar_one()
         await db_session.delete(obj)
         await db_session.commit()
+        await self.invalidate_count_cache()
         return obj
@@ -2,16 +2,29 @@ from app.models.group_model import Group
 from app.models.user_model import User
 from app.schemas.group_schema import IGroupCreate, IGroupUpdate
 from app.crud.base_crud import CRUDBase
+from app.crud.user_crud import CRUDUser
+from app.schemas.common_schema import ILoadProfileEnum
+from sqlalchemy.orm import raiseload, selectinload
 from sqlmodel import select
 from uuid import UUID
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 
 class CRUDGroup(CRUDBase[Group, IGroupCreate, IGroupUpdate]):
+    load_profiles = {
+        # IGroupReadWithUsers
+        ILoadProfileEnum.full: [
+            selectinload(Group.users).options(
+                *CRUDUser.load_profiles[ILoadProfileEnum.list]
+            ),
+            raiseload("*"),
+        ],
+    }
+
     async def get_group_by_name(
         self, *, name: str, db_session: AsyncSession | None = None
     ) -> Group:
-        db_session = db_session or super().get_db().session
+        db_session = db_session or self.get_read_session()
         group = await db_session.execute(select(Group).where(Group.name == name))
         return group.scalar_one_or_none()
 
@@ -2,42 +2,58 @@ from app.schemas.hero_schema import IHeroCreate, IHeroUpdate
 from datetime import datetime
 from app.crud.base_crud import CRUDBase
 from app.models.hero_model import Hero
-from sqlmodel import select, func, and_, col
+from app.schemas.common_schema import ICountStrategyEnum, ILoadProfileEnum
+from app.utils.search import trigram_match, trigram_score
+from sqlalchemy.orm import joinedload, raiseload
+from sqlmodel import select, and_
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
+
+
+# IHeroReadWithTeam renders the team columns, not its heroes nor created_by
+_team = [joinedload(Hero.team).raiseload("*"), raiseload("*")]
 
 
 class CRUDHero(CRUDBase[Hero, IHeroCreate, IHeroUpdate]):
+    load_profiles = {ILoadProfileEnum.list: _team, ILoadProfileEnum.full: _team}
+
     async def get_heroe_by_name(
-        self, *, name: str, db_session: AsyncSession | None = None
+        self,
+        *,
+        name: str,
+        load: ILoadProfileEnum | None = None,
+        db_session: AsyncSession | None = None,
     ) -> Hero:
-        db_session = db_session or super().get_db().session
-        heroe = await db_session.execute(
-            select(Hero).where(col(Hero.name).ilike(f"%{name}%"))
+        db_session = db_session or self.get_read_session()
+        query = (
+            select(Hero)
+            .where(trigram_match(Hero.name, name))
+            .order_by(trigram_score(Hero.name, name).desc(), Hero.id)
         )
+        heroe = await db_session.execute(self.apply_load(query, load))
         return heroe.scalars().all()
 
+    def get_export_query(self) -> Select:
+        """Columns of the heroes report, ordered by id"""
+        return self.get_columns_query(["id", "name", "secret_name", "age", "team_id"])
+
     async def get_count_of_heroes(
         self,
         *,
         start_time: datetime,
         end_time: datetime,
+        count_strategy: ICountStrategyEnum | None = ICountStrategyEnum.exact,
         db_session: AsyncSession | None = None,
     ) -> int:
-        db_session = db_session or super().get_db().session
-        subquery = (
-            select(Hero)
-            .where(
-                and_(
-                    Hero.created_at > start_time,
-                    Hero.created_at < end_time,
-                )
+        query = select(Hero).where(
+            and_(
+                Hero.created_at > start_time,
+                Hero.created_at < end_time,
             )
-            .subquery()
         )
-        query = select(func.count()).select_from(subquery)
-        count = await db_session.execute(query)
-        value = count.scalar_one_or_none()
-        return value
+        return await super().get_count(
+            query=query, count_strategy=count_strategy, db_session=db_session
+        )
 
 
 hero = CRUDHero(Hero)
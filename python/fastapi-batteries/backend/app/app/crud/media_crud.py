@@ -0,0 +1,10 @@
+from app.crud.base_crud import CRUDBase
+from app.models.media_model import Media
+from app.schemas.media_schema import IMediaCreate, IMediaUpdate
+
+
+class CRUDMedia(CRUDBase[Media, IMediaCreate, IMediaUpdate]):
+    pass
+
+
+media = CRUDMedia(Media)
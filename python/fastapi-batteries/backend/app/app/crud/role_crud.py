@@ -1,9 +1,12 @@
-from app.schemas.role_schema import IRoleCreate, IRoleUpdate
+from app.schemas.role_schema import IRoleCreate, IRoleRead, IRoleUpdate
 from app.models.role_model import Role
 from app.models.user_model import User
 from app.crud.base_crud import CRUDBase
+from app.schemas.bulk_schema import IBulkRead
+from app.utils.roles_cache import invalidate_roles, roles_cache
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
+from typing import Any
 from uuid import UUID
 
 
@@ -11,10 +14,103 @@ class CRUDRole(CRUDBase[Role, IRoleCreate, IRoleUpdate]):
     async def get_role_by_name(
         self, *, name: str, db_session: AsyncSession | None = None
     ) -> Role:
-        db_session = db_session or super().get_db().session
+        db_session = db_session or self.get_read_session()
         role = await db_session.execute(select(Role).where(Role.name == name))
         return role.scalar_one_or_none()
 
+    async def get_multi_read(
+        self, *, limit: int = 100, db_session: AsyncSession | None = None
+    ) -> list[IRoleRead]:
+        """Selects only the role columns, the users of each role are not loaded"""
+        db_session = db_session or self.get_read_session()
+        response = await db_session.execute(
+            select(Role.id, Role.name, Role.description).order_by(Role.id).limit(limit)
+        )
+        return [IRoleRead.from_orm(row) for row in response.all()]
+
+    async def get_multi_read_cached(
+        self, *, db_session: AsyncSession | None = None
+    ) -> list[IRoleRead]:
+        roles = roles_cache.get()
+        if roles is None:
+            roles = await self.get_multi_read(db_session=db_session)
+            roles_cache.set(roles)
+        return roles
+
+    async def create(
+        self,
+        *,
+        obj_in: IRoleCreate | Role,
+        created_by_id: UUID | str | None = None,
+        db_session: AsyncSession | None = None,
+    ) -> Role:
+        role = await super().create(
+            obj_in=obj_in, created_by_id=created_by_id, db_session=db_session
+        )
+        await invalidate_roles()
+        return role
+
+    async def create_multi(
+        self,
+        *,
+        obj_in: list[IRoleCreate | Role],
+        created_by_id: UUID | str | None = None,
+        chunk_size: int = 500,
+        db_session: AsyncSession | None = None,
+    ) -> IBulkRead[Role]:
+        roles = await super().create_multi(
+            obj_in=obj_in,
+            created_by_id=created_by_id,
+            chunk_size=chunk_size,
+            db_session=db_session,
+        )
+        await invalidate_roles()
+        return roles
+
+    async def update(
+        self,
+        *,
+        obj_current: Role,
+        obj_new: IRoleUpdate | dict[str, Any] | Role,
+        db_session: AsyncSession | None = None,
+    ) -> Role:
+        role = await super().update(
+            obj_current=obj_current, obj_new=obj_new, db_session=db_session
+        )
+        await invalidate_roles()
+        return role
+
+    async def update_multi(
+        self,
+        *,
+        list_ids: list[UUID | str],
+        obj_new: IRoleUpdate | dict[str, Any],
+        chunk_size: int = 500,
+        db_session: AsyncSession | None = None,
+    ) -> IBulkRead[Role]:
+        roles = await super().update_multi(
+            list_ids=list_ids,
+            obj_new=obj_new,
+            chunk_size=chunk_size,
+            db_session=db_session,
+        )
+        await invalidate_roles()
+        return roles
+
+    async def remove(
+        self, *, id: UUID | str, db_session: AsyncSession | None = None
+    ) -> Role:
+        role = await super().remove(id=id, db_session=db_session)
+        await invalidate_roles()
+        return role
+
+    async def remove_multi(
+        self, *, list_ids: list[UUID | str], db_session: AsyncSession | None = None
+    ) -> list[Role]:
+        roles = await super().remove_multi(list_ids=list_ids, db_session=db_session)
+        await invalidate_roles()
+        return roles
+
     async def add_role_to_user(self, *, user: User, role_id: UUID) -> Role:
         db_session = super().get_db().session
         role = await super().get(id=role_id)
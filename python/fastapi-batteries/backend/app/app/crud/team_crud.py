@@ -9,7 +9,7 @@ class CRUDTeam(CRUDBase[Team, ITeamCreate, ITeamUpdate]):
     async def get_team_by_name(
         self, *, name: str, db_session: AsyncSession | None = None
     ) -> Team:
-        db_session = db_session or super().get_db().session
+        db_session = db_session or self.get_read_session()
         team = await db_session.execute(select(Team).where(Team.name == name))
         return team.scalar_one_or_none()
 
@@ -1,23 +1,70 @@
+from app.schemas.image_media_schema import IImageRenditionCreate
 from app.schemas.media_schema import IMediaCreate
+from app.schemas.bulk_schema import IBulkRead
 from app.schemas.user_schema import IUserCreate, IUserUpdate
 from app.models.user_model import User
+from app.models.role_model import Role
 from app.models.media_model import Media
 from app.models.image_media_model import ImageMedia
-from app.core.security import verify_password, get_password_hash
+from app.core.password import password_service
 from pydantic.networks import EmailStr
 from typing import Any
 from app.crud.base_crud import CRUDBase
 from app.crud.user_follow_crud import user_follow as UserFollowCRUD
+from app.schemas.common_schema import (
+    ICountStrategyEnum,
+    ILoadProfileEnum,
+    IOrderEnum,
+)
+from app.schemas.response_schema import ICursorParams, IGetResponseCursorPaginated
+from app.utils.search import FULL_NAME_SEPARATOR, trigram_match, trigram_score
+from app.utils.user_cache import invalidate_user, invalidate_users
+from sqlalchemy import update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import joinedload, raiseload, selectinload
 from sqlmodel import select
+from sqlmodel.sql.expression import Select
 from uuid import UUID
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 
+# Role.users is not needed by any user schema, it would load every user of the role
+_role = joinedload(User.role).raiseload("*")
+_image = joinedload(User.image).options(
+    joinedload(ImageMedia.media),
+    selectinload(ImageMedia.renditions).options(
+        joinedload(ImageMedia.media), raiseload(ImageMedia.renditions)
+    ),
+)
+
+
 class CRUDUser(CRUDBase[User, IUserCreate, IUserUpdate]):
+    load_profiles = {
+        # What the auth dependency needs to check the required roles
+        ILoadProfileEnum.minimal: [_role, raiseload("*")],
+        # IUserReadWithoutGroups
+        ILoadProfileEnum.list: [_role, _image, raiseload("*")],
+        # IUserRead
+        ILoadProfileEnum.full: [
+            _role,
+            _image,
+            selectinload(User.groups).raiseload("*"),
+            raiseload("*"),
+        ],
+    }
+    # Not nullable, hashed_password is left out
+    cursor_order_columns = {
+        "id",
+        "first_name",
+        "last_name",
+        "is_active",
+        "is_superuser",
+    }
+
     async def get_by_email(
         self, *, email: str, db_session: AsyncSession | None = None
     ) -> User | None:
-        db_session = db_session or super().get_db().session
+        db_session = db_session or self.get_read_session()
         users = await db_session.execute(select(User).where(User.email == email))
         return users.scalar_one_or_none()
 
@@ -30,37 +77,154 @@ class CRUDUser(CRUDBase[User, IUserCreate, IUserUpdate]):
 
         return user
 
+    async def search_paginated(
+        self,
+        *,
+        text: str,
+        is_active: bool | None = None,
+        params: ICursorParams | None = ICursorParams(),
+        load: ILoadProfileEnum | None = None,
+        db_session: AsyncSession | None = None,
+    ) -> IGetResponseCursorPaginated[User]:
+        """Users whose full name matches `text`, the most relevant first"""
+        full_name = User.first_name + FULL_NAME_SEPARATOR + User.last_name
+        query = select(User).where(trigram_match(full_name, text))
+        if is_active is not None:
+            query = query.where(User.is_active == is_active)
+        return await self.get_multi_cursor_paginated(
+            params=params,
+            order_by=trigram_score(full_name, text),
+            order=IOrderEnum.descendent,
+            query=query,
+            count_strategy=ICountStrategyEnum.estimate,
+            load=load,
+            db_session=db_session,
+        )
+
+    def get_export_query(self) -> Select:
+        """Columns of the users report, ordered by id"""
+        return self.get_columns_query(
+            [
+                "id",
+                "first_name",
+                "last_name",
+                "email",
+                "is_active",
+                "is_superuser",
+                "birthdate",
+                Role.name.label("role"),
+                "phone",
+                "gender",
+                "state",
+                "country",
+                "address",
+                "follower_count",
+                "following_count",
+                "created_at",
+            ]
+        ).outerjoin(Role, User.role_id == Role.id)
+
     async def create_with_role(
         self, *, obj_in: IUserCreate, db_session: AsyncSession | None = None
     ) -> User:
         db_session = db_session or super().get_db().session
         db_obj = User.from_orm(obj_in)
-        db_obj.hashed_password = get_password_hash(obj_in.password)
+        db_obj.hashed_password = await password_service.hash(obj_in.password)
         db_session.add(db_obj)
         await db_session.commit()
         await db_session.refresh(db_obj)
+        await self.invalidate_count_cache()
         return db_obj
 
     async def update_is_active(
         self, *, db_obj: list[User], obj_in: int | str | dict[str, Any]
-    ) -> User | None:
-        response = None
-        db_session = super().get_db().session
-        for x in db_obj:
-            x.is_active = obj_in.is_active
-            db_session.add(x)
-            await db_session.commit()
-            await db_session.refresh(x)
-            response.append(x)
-        return response
+    ) -> IBulkRead[User]:
+        is_active = (
+            obj_in["is_active"] if isinstance(obj_in, dict) else obj_in.is_active
+        )
+        return await self.update_multi(
+            list_ids=[x.id for x in db_obj], obj_new={"is_active": is_active}
+        )
 
-    async def authenticate(self, *, email: EmailStr, password: str) -> User | None:
-        user = await self.get_by_email(email=email)
-        if not user:
+    async def update_multi(
+        self,
+        *,
+        list_ids: list[UUID | str],
+        obj_new: IUserUpdate | dict[str, Any],
+        chunk_size: int = 500,
+        db_session: AsyncSession | None = None,
+    ) -> IBulkRead[User]:
+        result = await super().update_multi(
+            list_ids=list_ids,
+            obj_new=obj_new,
+            chunk_size=chunk_size,
+            db_session=db_session,
+        )
+        await invalidate_users([user.id for user in result.items])
+        return result
+
+    async def update(
+        self,
+        *,
+        obj_current: User,
+        obj_new: IUserUpdate | dict[str, Any] | User,
+        db_session: AsyncSession | None = None,
+    ) -> User:
+        user = await super().update(
+            obj_current=obj_current, obj_new=obj_new, db_session=db_session
+        )
+        await invalidate_user(user.id)
+        return user
+
+    async def authenticate_credentials(
+        self,
+        *,
+        email: EmailStr,
+        password: str,
+        db_session: AsyncSession | None = None,
+    ) -> Row | None:
+        """
+        Checks the password reading only the user's id, hashed_password and
+        is_active columns, none of the user's relationships are loaded
+        """
+        db_session = db_session or super().get_db().session
+        response = await db_session.execute(
+            select(User.id, User.hashed_password, User.is_active).where(
+                User.email == email
+            )
+        )
+        credentials = response.one_or_none()
+        if not credentials:
             return None
-        if not verify_password(password, user.hashed_password):
+        is_valid, new_hash = await password_service.verify_and_update(
+            password, credentials.hashed_password
+        )
+        if not is_valid:
             return None
-        return user
+        if new_hash is not None:
+            await db_session.execute(
+                update(User)
+                .where(User.id == credentials.id)
+                .values(hashed_password=new_hash)
+            )
+            await db_session.commit()
+            await invalidate_user(credentials.id)
+        return credentials
+
+    async def authenticate(
+        self,
+        *,
+        email: EmailStr,
+        password: str,
+        db_session: AsyncSession | None = None,
+    ) -> User | None:
+        db_session = db_session or super().get_db().session
+        credentials = await self.authenticate_credentials(
+            email=email, password=password, db_session=db_session
+        )
+        if not credentials:
+            return None
+        return await self.get(id=credentials.id, db_session=db_session)
 
     async def update_photo(
         self,
@@ -70,49 +234,72 @@ class CRUDUser(CRUDBase[User, IUserCreate, IUserUpdate]):
         heigth: int,
         width: int,
         file_format: str,
+        renditions: list[IImageRenditionCreate] | None = None,
+        db_session: AsyncSession | None = None,
     ) -> User:
-        db_session = super().get_db().session
+        db_session = db_session or super().get_db().session
         user.image = ImageMedia(
             media=Media.from_orm(image),
             height=heigth,
             width=width,
             file_format=file_format,
+            renditions=[
+                ImageMedia(
+                    media=Media.from_orm(rendition.media),
+                    height=rendition.height,
+                    width=rendition.width,
+                    file_format=rendition.file_format,
+                )
+                for rendition in renditions or []
+            ],
         )
         db_session.add(user)
         await db_session.commit()
-        await db_session.refresh(user)
+        # refresh would load the new image without its renditions
+        query = select(User).where(User.id == user.id)
+        response = await db_session.execute(
+            self.apply_load(query, ILoadProfileEnum.full).execution_options(
+                populate_existing=True
+            )
+        )
+        user = response.scalar_one()
+        await invalidate_user(user.id)
         return user
 
     async def remove(
-        self, *, id: UUID | str, db_session: AsyncSession | None = None
+        self,
+        *,
+        id: UUID | str,
+        follows_batch_size: int | None = None,
+        db_session: AsyncSession | None = None,
     ) -> User:
         db_session = db_session or super().get_db().session
+        query = select(self.model).where(self.model.id == id)
         response = await db_session.execute(
-            select(self.model).where(self.model.id == id)
+            self.apply_load(query, ILoadProfileEnum.full)
         )
         obj = response.scalar_one()
 
-        followings = await UserFollowCRUD.get_follow_by_user_id(user_id=obj.id)
-        if followings:
-            for following in followings:
-                user = await self.get(id=following.target_user_id)
-                user.follower_count -= 1
-                db_session.add(user)
-                await db_session.delete(following)
-
-        followeds = await UserFollowCRUD.get_follow_by_target_user_id(
-            target_user_id=obj.id
+        await UserFollowCRUD.remove_follows_by_user_ids(
+            list_ids=[obj.id], batch_size=follows_batch_size, db_session=db_session
         )
-        if followeds:
-            for followed in followeds:
-                user = await self.get(id=followed.user_id)
-                user.following_count -= 1
-                db_session.add(user)
-                await db_session.delete(followed)
 
         await db_session.delete(obj)
         await db_session.commit()
+        await invalidate_user(obj.id)
+        await self.invalidate_count_cache()
         return obj
 
+    async def remove_multi(
+        self, *, list_ids: list[UUID | str], db_session: AsyncSession | None = None
+    ) -> list[User]:
+        db_session = db_session or super().get_db().session
+        await UserFollowCRUD.remove_follows_by_user_ids(
+            list_ids=list_ids, db_session=db_session
+        )
+        users = await super().remove_multi(list_ids=list_ids, db_session=db_session)
+        await invalidate_users([user.id for user in users])
+        return users
+
 
 user = CRUDUser(User)
@@ -1,10 +1,22 @@
 from uuid import UUID
-from sqlmodel import and_, select
+from sqlalchemy import delete, func, literal, union_all, update
+from sqlalchemy.dialects.postgresql import insert
+from fastapi_pagination import Page, Params
+from sqlalchemy.orm import aliased
+from sqlmodel import and_, or_, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.crud.base_crud import CRUDBase
 from app.models.user_follow_model import UserFollow as UserFollowModel
 from app.models.user_model import User
-from app.schemas.user_follow_schema import IUserFollowCreate, IUserFollowUpdate
+from app.schemas.user_follow_schema import (
+    IUserFollowCreate,
+    IUserFollowStatus,
+    IUserFollowSuggestionRead,
+    IUserFollowUpdate,
+    IUserFollowUserRead,
+)
+from app.utils.exceptions import UserNotFollowedException
+from app.utils.follow_counters import increment_follow_counters
 
 
 class CRUDUserFollow(CRUDBase[UserFollowModel, IUserFollowCreate, IUserFollowUpdate]):
@@ -14,29 +26,54 @@ class CRUDUserFollow(CRUDBase[UserFollowModel, IUserFollowCreate, IUserFollowUpd
         user: User,
         target_user: User,
         db_session: AsyncSession | None = None,
-    ) -> UserFollowModel:
+    ) -> UserFollowModel | None:
+        """
+        Inserts the follow with INSERT ... ON CONFLICT DO NOTHING RETURNING,
+        returns None if the user already follows the target user.
+        """
         db_session = db_session or super().get_db().session
         new_user_follow = IUserFollowCreate(
             user_id=user.id, target_user_id=target_user.id
         )
         db_obj = UserFollowModel.from_orm(new_user_follow)
 
-        reverse_follow = await self.get_follow_by_user_id_and_target_user_id(
-            user_id=target_user.id, target_user_id=user.id
+        table = UserFollowModel.__table__
+        reverse_follow = select(UserFollowModel.id).where(
+            UserFollowModel.user_id == target_user.id,
+            UserFollowModel.target_user_id == user.id,
+        )
+        response = await db_session.execute(
+            select(UserFollowModel).from_statement(
+                insert(table)
+                .values(
+                    {
+                        **{c.name: getattr(db_obj, c.name) for c in table.columns},
+                        "is_mutual": reverse_follow.exists(),
+                    }
+                )
+                .on_conflict_do_nothing(index_elements=["user_id", "target_user_id"])
+                .returning(*table.columns)
+            )
         )
-        if reverse_follow:
-            db_obj.is_mutual = True
-            reverse_follow.is_mutual = True
-            db_session.add(reverse_follow)
-        db_session.add(db_obj)
+        db_obj = response.scalar_one_or_none()
+        if db_obj is None:
+            return None
 
-        user.following_count += 1
-        target_user.follower_count += 1
+        if db_obj.is_mutual:
+            await db_session.execute(
+                update(UserFollowModel)
+                .where(UserFollowModel.id.in_(reverse_follow.scalar_subquery()))
+                .values(is_mutual=True)
+                .execution_options(synchronize_session=False)
+            )
 
-        db_session.add(user)
-        db_session.add(target_user)
+        await increment_follow_counters(
+            user_id=user.id,
+            target_user_id=target_user.id,
+            delta=1,
+            db_session=db_session,
+        )
         await db_session.commit()
-        await db_session.refresh(db_obj)
         return db_obj
 
     async def unfollow_a_user_by_id(
@@ -47,30 +84,48 @@ class CRUDUserFollow(CRUDBase[UserFollowModel, IUserFollowCreate, IUserFollowUpd
         target_user: User,
         db_session: AsyncSession | None = None,
     ) -> UserFollowModel:
+        """
+        Deletes the follow with DELETE ... RETURNING, so of two concurrent unfollows
+        only the one that deleted the row updates the counters, the other one raises
+        UserNotFollowedException.
+        """
         db_session = db_session or super().get_db().session
 
-        follow_user_obj = await self.get(id=user_follow_id)
-        await db_session.delete(follow_user_obj)
-
-        reverse_follow = await self.get_follow_by_user_id_and_target_user_id(
-            user_id=target_user.id, target_user_id=user.id
+        table = UserFollowModel.__table__
+        response = await db_session.execute(
+            select(UserFollowModel).from_statement(
+                delete(table)
+                .where(table.c.id == user_follow_id)
+                .returning(*table.columns)
+            )
         )
-        if reverse_follow:
-            reverse_follow.is_mutual = False
-            db_session.add(reverse_follow)
+        follow_user_obj = response.scalar_one_or_none()
+        if follow_user_obj is None:
+            raise UserNotFollowedException(user_name=target_user.last_name)
 
-        user.following_count -= 1
-        target_user.follower_count -= 1
+        await db_session.execute(
+            update(UserFollowModel)
+            .where(
+                UserFollowModel.user_id == target_user.id,
+                UserFollowModel.target_user_id == user.id,
+            )
+            .values(is_mutual=False)
+            .execution_options(synchronize_session=False)
+        )
 
-        db_session.add(user)
-        db_session.add(target_user)
+        await increment_follow_counters(
+            user_id=user.id,
+            target_user_id=target_user.id,
+            delta=-1,
+            db_session=db_session,
+        )
         await db_session.commit()
         return follow_user_obj
 
     async def get_follow_by_user_id(
         self, *, user_id: UUID, db_session: AsyncSession | None = None
     ) -> list[UserFollowModel] | None:
-        db_session = db_session or super().get_db().session
+        db_session = db_session or self.get_read_session()
         followed = await db_session.execute(
             select(UserFollowModel).where(UserFollowModel.user_id == user_id)
         )
@@ -79,7 +134,7 @@ class CRUDUserFollow(CRUDBase[UserFollowModel, IUserFollowCreate, IUserFollowUpd
     async def get_follow_by_target_user_id(
         self, *, target_user_id: UUID, db_session: AsyncSession | None = None
     ) -> list[UserFollowModel] | None:
-        db_session = db_session or super().get_db().session
+        db_session = db_session or self.get_read_session()
         followed = await db_session.execute(
             select(UserFollowModel).where(
                 UserFollowModel.target_user_id == target_user_id
@@ -94,7 +149,7 @@ class CRUDUserFollow(CRUDBase[UserFollowModel, IUserFollowCreate, IUserFollowUpd
         target_user_id: UUID,
         db_session: AsyncSession | None = None,
     ) -> UserFollowModel | None:
-        db_session = db_session or super().get_db().session
+        db_session = db_session or self.get_read_session()
         followed_user = await db_session.execute(
             select(UserFollowModel).where(
                 and_(
@@ -105,5 +160,196 @@ class CRUDUserFollow(CRUDBase[UserFollowModel, IUserFollowCreate, IUserFollowUpd
         )
         return followed_user.scalar_one_or_none()
 
+    async def get_follow_status_by_target_user_ids(
+        self,
+        *,
+        user_id: UUID,
+        target_user_ids: list[UUID],
+        db_session: AsyncSession | None = None,
+    ) -> list[IUserFollowStatus]:
+        """Follow status between the user and each target user in one query"""
+        db_session = db_session or self.get_read_session()
+        response = await db_session.execute(
+            select(UserFollowModel.user_id, UserFollowModel.target_user_id).where(
+                or_(
+                    and_(
+                        UserFollowModel.user_id == user_id,
+                        UserFollowModel.target_user_id.in_(target_user_ids),
+                    ),
+                    and_(
+                        UserFollowModel.target_user_id == user_id,
+                        UserFollowModel.user_id.in_(target_user_ids),
+                    ),
+                )
+            )
+        )
+        following = set()
+        followed_by = set()
+        for follower_id, followed_id in response.all():
+            if follower_id == user_id:
+                following.add(followed_id)
+            else:
+                followed_by.add(follower_id)
+
+        return [
+            IUserFollowStatus(
+                target_user_id=id,
+                is_following=id in following,
+                is_followed_by=id in followed_by,
+                is_mutual=id in following and id in followed_by,
+            )
+            for id in dict.fromkeys(target_user_ids)
+        ]
+
+    async def get_mutual_followers_paginated(
+        self,
+        *,
+        user_id: UUID,
+        other_user_id: UUID,
+        params: Params | None = Params(),
+        db_session: AsyncSession | None = None,
+    ) -> Page[IUserFollowUserRead]:
+        """Users following both `user_id` and `other_user_id`"""
+        follows_user = aliased(UserFollowModel)
+        follows_other_user = aliased(UserFollowModel)
+        query = (
+            select(
+                User.id,
+                User.first_name,
+                User.last_name,
+                User.follower_count,
+                User.following_count,
+            )
+            .join(follows_user, follows_user.user_id == User.id)
+            .join(follows_other_user, follows_other_user.user_id == User.id)
+            .where(
+                follows_user.target_user_id == user_id,
+                follows_other_user.target_user_id == other_user_id,
+            )
+            .order_by(User.id)
+        )
+        return await super().get_multi_paginated(
+            query=query, params=params, db_session=db_session
+        )
+
+    async def get_follow_suggestions_paginated(
+        self,
+        *,
+        user_id: UUID,
+        params: Params | None = Params(),
+        db_session: AsyncSession | None = None,
+    ) -> Page[IUserFollowSuggestionRead]:
+        """
+        Friends of friends: users followed by the people `user_id` follows, ranked
+        by how many of them follow each one. Already followed users are excluded.
+        """
+        mine = aliased(UserFollowModel)
+        theirs = aliased(UserFollowModel)
+        already_followed = select(UserFollowModel.target_user_id).where(
+            UserFollowModel.user_id == user_id
+        )
+        mutual_count = func.count(theirs.user_id).label("mutual_count")
+        query = (
+            select(
+                User.id,
+                User.first_name,
+                User.last_name,
+                User.follower_count,
+                User.following_count,
+                mutual_count,
+            )
+            .select_from(mine)
+            .join(theirs, theirs.user_id == mine.target_user_id)
+            .join(User, User.id == theirs.target_user_id)
+            .where(
+                mine.user_id == user_id,
+                theirs.target_user_id != user_id,
+                theirs.target_user_id.not_in(already_followed),
+            )
+            .group_by(User.id)
+            .order_by(mutual_count.desc(), User.id)
+        )
+        return await super().get_multi_paginated(
+            query=query, params=params, db_session=db_session
+        )
+
+    async def remove_follows_by_user_ids(
+        self,
+        *,
+        list_ids: list[UUID],
+        batch_size: int | None = None,
+        db_session: AsyncSession | None = None,
+    ) -> int:
+        """
+        Deletes every follow from or to the users and decrements the counters
+        of the other side in one statement per batch: the rows returned by the
+        DELETE feed a single UPDATE ... FROM with the per user deltas.
+        Without `batch_size` everything is done in one statement and the caller commits,
+        otherwise each batch is committed. Returns the number of follows removed.
+        """
+        db_session = db_session or super().get_db().session
+        removed = 0
+        while True:
+            follow_ids = select(UserFollowModel.id).where(
+                or_(
+                    UserFollowModel.user_id.in_(list_ids),
+                    UserFollowModel.target_user_id.in_(list_ids),
+                )
+            )
+            if batch_size:
+                follow_ids = follow_ids.limit(batch_size)
+
+            deleted = (
+                delete(UserFollowModel)
+                .where(UserFollowModel.id.in_(follow_ids.scalar_subquery()))
+                .returning(UserFollowModel.user_id, UserFollowModel.target_user_id)
+                .cte("deleted")
+            )
+            changes = union_all(
+                select(
+                    deleted.c.target_user_id.label("id"),
+                    literal(1).label("followers"),
+                    literal(0).label("followings"),
+                ),
+                select(
+                    deleted.c.user_id.label("id"),
+                    literal(0).label("followers"),
+                    literal(1).label("followings"),
+                ),
+            ).subquery()
+            deltas = (
+                select(
+                    changes.c.id,
+                    func.sum(changes.c.followers).label("followers"),
+                    func.sum(changes.c.followings).label("followings"),
+                )
+                .group_by(changes.c.id)
+                .subquery()
+            )
+            updated = (
+                update(User)
+                .where(User.id == deltas.c.id)
+                .values(
+                    follower_count=User.follower_count - deltas.c.followers,
+                    following_count=User.following_count - deltas.c.followings,
+                )
+                .returning(User.id)
+                .cte("updated")
+            )
+            response = await db_session.execute(
+                select(
+                    select(func.count()).select_from(deleted).scalar_subquery(),
+                    select(func.count()).select_from(updated).scalar_subquery(),
+                )
+            )
+            batch_removed, _ = response.one()
+            removed += batch_removed
+
+            if not batch_size:
+                return removed
+            await db_session.commit()
+            if batch_removed < batch_size:
+                return removed
+
 
 user_follow = CRUDUserFollow(UserFollowModel)
@@ -0,0 +1,110 @@
+import time
+from typing import Any
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool
+from app.core.config import ModeEnum, settings
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that also counts checkouts and the time spent waiting for them"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_seconds += elapsed
+            self.max_wait_seconds = max(self.max_wait_seconds, elapsed)
+
+
+def get_connect_args(url: str, pgbouncer: bool) -> dict[str, Any]:
+    if make_url(url).get_driver_name() != "asyncpg":
+        return {}
+    if pgbouncer:
+        # Prepared statements do not survive PgBouncer handing the server
+        # connection to another client after each transaction, and it rejects
+        # the startup parameters, set statement_timeout on the database role.
+        return {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+    connect_args: dict[str, Any] = {
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {
+            "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)
+        }
+    return connect_args
+
+
+def create_db_engine(
+    url: str,
+    *,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+    poolclass: type[Pool] | None = None,
+) -> AsyncEngine:
+    """
+    Creates an engine with the pool settings of the app. Each process creates
+    its engines once at import and every session of the process shares them.
+    With `poolclass=NullPool` every session opens and closes its own connection.
+    """
+    engine_args: dict[str, Any] = {
+        "echo": False,
+        "future": True,
+        "connect_args": get_connect_args(url, settings.DB_PGBOUNCER),
+    }
+    # Asincio pytest works with NullPool
+    if settings.MODE == ModeEnum.testing or poolclass is NullPool:
+        engine_args["poolclass"] = NullPool
+    else:
+        engine_args.update(
+            poolclass=poolclass or InstrumentedQueuePool,
+            pool_size=pool_size or settings.POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW
+            if max_overflow is None
+            else max_overflow,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    return create_async_engine(url, **engine_args)
+
+
+def get_db_pool_stats(engine: AsyncEngine) -> dict[str, int | float]:
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return {
+            "pool_size": 0,
+            "checked_out": 0,
+            "idle": 0,
+            "overflow": 0,
+            "checkouts": 0,
+            "timeouts": 0,
+            "average_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+    return {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": pool.checkouts,
+        "timeouts": pool.timeouts,
+        "average_wait_seconds": pool.wait_seconds / pool.checkouts
+        if pool.checkouts
+        else 0.0,
+        "max_wait_seconds": pool.max_wait_seconds,
+    }
@@ -68,12 +68,13 @@ heroes: list[dict[str, str | IHeroCreate]] = [
 
 
 async def init_db(db_session: AsyncSession) -> None:
-    for role in roles:
-        role_current = await crud.role.get_role_by_name(
-            name=role.name, db_session=db_session
-        )
-        if not role_current:
-            await crud.role.create(obj_in=role, db_session=db_session)
+    new_roles = [
+        role
+        for role in roles
+        if not await crud.role.get_role_by_name(name=role.name, db_session=db_session)
+    ]
+    if new_roles:
+        await crud.role.create_multi(obj_in=new_roles, db_session=db_session)
 
     for user in users:
         current_user = await crud.user.get_by_email(
@@ -108,31 +109,33 @@ async def init_db(db_session: AsyncSession) -> None:
                 users=current_users, group_id=new_group.id, db_session=db_session
             )
 
-    for team in teams:
-        current_team = await crud.team.get_team_by_name(
-            name=team.name, db_session=db_session
+    superuser = await crud.user.get_by_email(
+        email=users[0]["data"].email, db_session=db_session
+    )
+
+    new_teams = [
+        team
+        for team in teams
+        if not await crud.team.get_team_by_name(name=team.name, db_session=db_session)
+    ]
+    if new_teams:
+        await crud.team.create_multi(
+            obj_in=new_teams, created_by_id=superuser.id, db_session=db_session
         )
-        if not current_team:
-            current_user = await crud.user.get_by_email(
-                email=users[0]["data"].email, db_session=db_session
-            )
-            await crud.team.create(
-                obj_in=team, created_by_id=current_user.id, db_session=db_session
-            )
 
+    new_heroes = []
     for heroe in heroes:
         current_heroe = await crud.hero.get_heroe_by_name(
             name=heroe["data"].name, db_session=db_session
         )
-        team = await crud.team.get_team_by_name(
-            name=heroe["team"], db_session=db_session
-        )
         if not current_heroe:
-            current_user = await crud.user.get_by_email(
-                email=users[0]["data"].email, db_session=db_session
+            team = await crud.team.get_team_by_name(
+                name=heroe["team"], db_session=db_session
             )
             new_heroe = heroe["data"]
             new_heroe.team_id = team.id
-            await crud.hero.create(
-                obj_in=new_heroe, created_by_id=current_user.id, db_session=db_session
-            )
+            new_heroes.append(new_heroe)
+    if new_heroes:
+        await crud.hero.create_multi(
+            obj_in=new_heroes, created_by_id=superuser.id, db_session=db_session
+        )
@@ -0,0 +1,84 @@
+import asyncio
+from typing import Any
+from weakref import WeakKeyDictionary
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.connection import AbstractConnection
+from app.core.config import settings
+
+# redis.asyncio connections are bound to the loop that opened them. The app has a
+# single loop, the Celery tasks run each one in its own loop.
+_clients: WeakKeyDictionary[asyncio.AbstractEventLoop, Redis] = WeakKeyDictionary()
+
+
+class InstrumentedBlockingConnectionPool(BlockingConnectionPool):
+    """Blocking pool that also counts the connections it created and lent out"""
+
+    def reset(self) -> None:
+        super().reset()
+        self.created_connections = 0
+        # A set, get_connection releases a connection it failed to lend out
+        self.in_use: set[AbstractConnection] = set()
+
+    def make_connection(self) -> AbstractConnection:
+        connection = super().make_connection()
+        self.created_connections += 1
+        return connection
+
+    async def get_connection(
+        self, command_name: Any, *keys: Any, **options: Any
+    ) -> AbstractConnection:
+        connection = await super().get_connection(command_name, *keys, **options)
+        self.in_use.add(connection)
+        return connection
+
+    async def release(self, connection: AbstractConnection) -> None:
+        self.in_use.discard(connection)
+        await super().release(connection)
+
+
+def create_redis_client() -> Redis:
+    pool = InstrumentedBlockingConnectionPool.from_url(
+        f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}",
+        max_connections=settings.REDIS_POOL_SIZE,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        socket_keepalive=True,
+        retry_on_timeout=True,
+        encoding="utf8",
+        decode_responses=True,
+    )
+    return Redis(connection_pool=pool)
+
+
+async def get_redis_client() -> Redis:
+    """Client sharing the connection pool of the running loop, created on first use"""
+    loop = asyncio.get_running_loop()
+    redis_client = _clients.get(loop)
+    if redis_client is None:
+        redis_client = _clients[loop] = create_redis_client()
+    return redis_client
+
+
+async def init_redis_pool() -> Redis:
+    """Opens the pool and checks the server is reachable, fails the startup if not"""
+    redis_client = await get_redis_client()
+    await redis_client.ping()
+    return redis_client
+
+
+async def close_redis_pool() -> None:
+    redis_client = _clients.pop(asyncio.get_running_loop(), None)
+    if redis_client is not None:
+        await redis_client.close()
+        await redis_client.connection_pool.disconnect()
+
+
+def get_redis_pool_stats(redis_client: Redis) -> dict[str, int]:
+    pool: InstrumentedBlockingConnectionPool = redis_client.connection_pool
+    in_use = len(pool.in_use)
+    return {
+        "max_connections": pool.max_connections,
+        "created_connections": pool.created_connections,
+        "idle_connections": pool.created_connections - in_use,
+        "in_use_connections": in_use,
+    }
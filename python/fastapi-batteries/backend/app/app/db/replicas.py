@@ -0,0 +1,142 @@
+import asyncio
+import itertools
+import logging
+from contextvars import ContextVar
+from uuid import UUID
+from fastapi import Request, Response
+from jose import jwt
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from app.core import security
+from app.core.config import settings
+from app.db.engine import create_db_engine
+from app.db.redis_pool import get_redis_client
+
+READ_ONLY_METHODS = {"GET", "HEAD"}
+
+_read_session: ContextVar[AsyncSession | None] = ContextVar(
+    "_read_session", default=None
+)
+
+
+class Replica:
+    def __init__(self, uri: str):
+        self.engine: AsyncEngine = create_db_engine(uri)
+        self.session_factory = sessionmaker(
+            self.engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        # Unused until the first health check succeeds
+        self.is_healthy = False
+
+
+class ReplicaSet:
+    """Read replicas of the app database, used in turns while they are healthy"""
+
+    def __init__(self, uris: list[str]):
+        self.replicas = [Replica(uri) for uri in uris]
+        self._turns = itertools.cycle(self.replicas)
+
+    def get_replica(self) -> Replica | None:
+        for _ in range(len(self.replicas)):
+            replica = next(self._turns)
+            if replica.is_healthy:
+                return replica
+        return None
+
+    async def check_replica(self, replica: Replica) -> None:
+        try:
+            # The timeout also covers opening the connection to a stuck replica
+            await asyncio.wait_for(
+                self._ping(replica), settings.REPLICA_HEALTH_CHECK_TIMEOUT
+            )
+            is_healthy = True
+        except Exception as e:
+            logging.error(f"Read replica {replica.engine.url!r} failed: {e!r}")
+            is_healthy = False
+        replica.is_healthy = is_healthy
+
+    async def _ping(self, replica: Replica) -> None:
+        async with replica.engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def check_health(self) -> None:
+        await asyncio.gather(*(self.check_replica(r) for r in self.replicas))
+
+    async def monitor(self) -> None:
+        while True:
+            await asyncio.sleep(settings.REPLICA_HEALTH_CHECK_INTERVAL)
+            await self.check_health()
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+replica_set = ReplicaSet(settings.ASYNC_REPLICA_DATABASE_URIS)
+
+
+def get_read_session() -> AsyncSession | None:
+    """Replica session of the current request, None when it reads the primary"""
+    return _read_session.get()
+
+
+def get_last_write_key(user_id: UUID | str) -> str:
+    return f"user:{user_id}:last_write"
+
+
+def get_request_user_id(request: Request) -> str | None:
+    header_parts = request.headers.get("Authorization", "").split()
+    if len(header_parts) != 2 or header_parts[0].lower() != "bearer":
+        return None
+    try:
+        payload = jwt.decode(
+            header_parts[1], settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+        )
+    except jwt.JWTError:
+        return None
+    return payload.get("sub")
+
+
+class ReplicaRoutingMiddleware(BaseHTTPMiddleware):
+    """
+    GET and HEAD requests read from a healthy replica through the CRUD read
+    methods, writes always use the primary. After a write, the requests of the
+    same user keep reading the primary for READ_YOUR_WRITES_SECONDS.
+    """
+
+    async def dispatch(
+        self, request: Request, call_next: RequestResponseEndpoint
+    ) -> Response:
+        if not replica_set.replicas:
+            return await call_next(request)
+
+        user_id = get_request_user_id(request)
+        redis_client = await get_redis_client()
+        if request.method not in READ_ONLY_METHODS:
+            response = await call_next(request)
+            if user_id and response.status_code < 400:
+                await redis_client.set(
+                    get_last_write_key(user_id),
+                    1,
+                    ex=settings.READ_YOUR_WRITES_SECONDS,
+                )
+            return response
+
+        replica = replica_set.get_replica()
+        if replica is None or (
+            user_id and await redis_client.exists(get_last_write_key(user_id))
+        ):
+            return await call_next(request)
+
+        async with replica.session_factory() as session:
+            token = _read_session.set(session)
+            try:
+                return await call_next(request)
+            finally:
+                _read_session.reset(token)
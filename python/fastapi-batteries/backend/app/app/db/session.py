@@ -1,26 +1,13 @@
 # https://stackoverflow.com/questions/75252097/fastapi-testing-runtimeerror-task-attached-to-a-different-loop/75444607#75444607
 from sqlalchemy.orm import sessionmaker
-from app.core.config import ModeEnum, settings
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from app.core.config import settings
+from app.db.engine import create_db_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.pool import NullPool, QueuePool
 
-DB_POOL_SIZE = 83
-WEB_CONCURRENCY = 9
-POOL_SIZE = max(DB_POOL_SIZE // WEB_CONCURRENCY, 5)
-
-connect_args = {"check_same_thread": False}
-
-engine = create_async_engine(
-    settings.ASYNC_DATABASE_URI,
-    echo=False,
-    future=True,
-    # pool_size=POOL_SIZE,
-    # max_overflow=64,
-    poolclass=NullPool
-    if settings.MODE == ModeEnum.testing
-    else QueuePool,  # Asincio pytest works with NullPool
-)
+# The pooled engine of the app database, the request sessions of
+# SQLAlchemyMiddleware share it with the scripts
+engine = create_db_engine(settings.ASYNC_DATABASE_URI)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -30,12 +17,10 @@ SessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
-engine_celery = create_async_engine(
+engine_celery = create_db_engine(
     settings.ASYNC_CELERY_BEAT_DATABASE_URI,
-    # echo=True,
-    future=True,
-    pool_size=POOL_SIZE,
-    max_overflow=64,
+    pool_size=settings.DB_CELERY_POOL_SIZE,
+    max_overflow=0,
 )
 
 SessionLocalCelery = sessionmaker(
@@ -45,3 +30,16 @@ SessionLocalCelery = sessionmaker(
     class_=AsyncSession,
     expire_on_commit=False,
 )
+
+# The Celery tasks run each one in a new event loop (asyncer.runnify) and an asyncpg
+# connection can not be used from another loop than the one that opened it, so the
+# sessions of the tasks open their own connection instead of pooling it
+engine_worker = create_db_engine(settings.ASYNC_DATABASE_URI, poolclass=NullPool)
+
+SessionLocalWorker = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=engine_worker,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
@@ -1,6 +1,7 @@
 from app import crud
 from app.models.role_model import Role
 from app.models.user_model import User
+from app.schemas.common_schema import ILoadProfileEnum
 from app.schemas.user_schema import IUserCreate
 from app.schemas.user_schema import IUserRead
 from app.utils.exceptions.common_exception import IdNotFoundException
@@ -16,7 +17,7 @@ async def user_exists(new_user: IUserCreate) -> IUserCreate:
             status_code=status.HTTP_409_CONFLICT,
             detail="There is already a user with same email",
         )
-    role = await crud.role.get(id=new_user.role_id)
+    role = await crud.role.get(id=new_user.role_id, load=ILoadProfileEnum.minimal)
     if not role:
         raise IdNotFoundException(Role, id=new_user.role_id)
 
@@ -26,7 +27,7 @@ async def user_exists(new_user: IUserCreate) -> IUserCreate:
 async def is_valid_user(
     user_id: Annotated[UUID, Path(title="The UUID id of the user")]
 ) -> IUserRead:
-    user = await crud.user.get(id=user_id)
+    user = await crud.user.get(id=user_id, load=ILoadProfileEnum.full)
     if not user:
         raise IdNotFoundException(User, id=user_id)
 
@@ -36,7 +37,7 @@ async def is_valid_user(
 async def is_valid_user_id(
     user_id: Annotated[UUID, Path(title="The UUID id of the user")]
 ) -> IUserRead:
-    user = await crud.user.get(id=user_id)
+    user = await crud.user.get(id=user_id, load=ILoadProfileEnum.minimal)
     if not user:
         raise IdNotFoundException(User, id=user_id)
 
@@ -1,3 +1,4 @@
+import asyncio
 import gc
 import logging
 from typing import Any
@@ -14,24 +15,37 @@ from fastapi import (
     status,
 )
 from app.core import security
-from app.api.deps import get_redis_client
+from app.api.deps import close_minio_client, minio_auth
+from app.db.redis_pool import close_redis_pool, get_redis_client, init_redis_pool
+from app.db.replicas import ReplicaRoutingMiddleware, replica_set
+from app.db.session import engine, engine_celery
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi_pagination import add_pagination
 from pydantic import ValidationError
 from starlette.middleware.cors import CORSMiddleware
 from app.api.v1.api import api_router as api_router_v1
-from app.core.config import ModeEnum, settings
+from app.core.config import settings
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from fastapi_async_sqlalchemy import SQLAlchemyMiddleware, db
 from contextlib import asynccontextmanager
+from asyncer import asyncify
+from app.utils.fast_response import add_fast_responses
 from app.utils.fastapi_globals import g, GlobalsMiddleware
+from app.core.password import password_service
+from app.utils.resize_image import shutdown_image_executor
+from app.utils.token_revocation import (
+    listen_token_revocations,
+    load_token_revocations,
+)
+from app.utils.roles_cache import listen_roles_invalidations
+from app.utils.user_cache import listen_user_invalidations
 from transformers import pipeline
 from fastapi_limiter import FastAPILimiter
 from jose import jwt
 from fastapi_limiter.depends import WebSocketRateLimiter
 from langchain.chat_models import ChatOpenAI
 from langchain.schema import HumanMessage
-from sqlalchemy.pool import NullPool, QueuePool
 
 
 async def user_id_identifier(request: Request):
@@ -72,15 +86,43 @@ async def user_id_identifier(request: Request):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    redis_client = await get_redis_client()
+    redis_client = await init_redis_pool()
     FastAPICache.init(RedisBackend(redis_client), prefix="fastapi-cache")
     await FastAPILimiter.init(redis_client, identifier=user_id_identifier)
+    user_cache_listener = asyncio.create_task(listen_user_invalidations(redis_client))
+    roles_cache_listener = asyncio.create_task(listen_roles_invalidations(redis_client))
+    token_revocations_listener = None
+    if settings.TOKEN_STATELESS_VERIFICATION:
+        # The filter has to be complete before the first request is verified
+        last_id = await load_token_revocations(redis_client)
+        token_revocations_listener = asyncio.create_task(
+            listen_token_revocations(redis_client, last_id)
+        )
+    replicas_monitor = None
+    if replica_set.replicas:
+        await replica_set.check_health()
+        replicas_monitor = asyncio.create_task(replica_set.monitor())
+    # Checks the bucket once, off the event loop
+    await asyncify(minio_auth)()
 
     print("startup fastapi")
     yield
     # shutdown
+    user_cache_listener.cancel()
+    roles_cache_listener.cancel()
+    if token_revocations_listener is not None:
+        token_revocations_listener.cancel()
+    if replicas_monitor is not None:
+        replicas_monitor.cancel()
     await FastAPICache.clear()
     await FastAPILimiter.close()
+    shutdown_image_executor()
+    password_service.shutdown()
+    close_minio_client()
+    await close_redis_pool()
+    await engine.dispose()
+    await engine_celery.dispose()
+    await replica_set.dispose()
     gc.collect()
 
 
@@ -90,22 +132,14 @@ app = FastAPI(
     version=settings.API_VERSION,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse
+    if settings.RESPONSE_FAST_PATH
+    else JSONResponse,
 )
 
 
-app.add_middleware(
-    SQLAlchemyMiddleware,
-    db_url=settings.ASYNC_DATABASE_URI,
-    engine_args={
-        "echo": False,
-        # "pool_pre_ping": True,
-        # "pool_size": settings.POOL_SIZE,
-        # "max_overflow": 64,
-        "poolclass": NullPool
-        if settings.MODE == ModeEnum.testing
-        else QueuePool,  # Asincio pytest works with NullPool
-    },
-)
+app.add_middleware(SQLAlchemyMiddleware, custom_engine=engine)
+app.add_middleware(ReplicaRoutingMiddleware)
 app.add_middleware(GlobalsMiddleware)
 
 # Set all CORS origins enabled
@@ -219,3 +253,5 @@ async def websocket_endpoint(websocket: WebSocket, user_id: UUID):
 # Add Routers
 app.include_router(api_router_v1, prefix=settings.API_V1_STR)
 add_pagination(app)
+if settings.RESPONSE_FAST_PATH:
+    add_fast_responses(app, trust_orm=settings.RESPONSE_TRUST_ORM)
@@ -1,16 +1,46 @@
+from typing import Any, TypeVar
 from app.utils.uuid6 import uuid7, UUID
+from pydantic.main import validate_model
 from sqlmodel import SQLModel as _SQLModel, Field
 from sqlalchemy.orm import declared_attr
 from datetime import datetime
 
 # id: implements proposal uuid7 draft4
 
+_TSQLModel = TypeVar("_TSQLModel", bound="SQLModel")
+
 
 class SQLModel(_SQLModel):
     @declared_attr  # type: ignore
     def __tablename__(cls) -> str:
         return cls.__name__
 
+    @classmethod
+    def validate(cls: type[_TSQLModel], value: Any) -> _TSQLModel:
+        """
+        SQLModel 0.0.8 validates a dict twice: validate runs validate_model and then
+        calls the model, whose __init__ validates the same values again. FastAPI
+        calls validate for every request body, so the schemas build the instance
+        from the first validation, with the same values, errors and fields set.
+        About twice as fast per body, see test/benchmarks/bench_validation.py.
+        The table models keep SQLModel's own validate, their __init__ also sets
+        up the SQLAlchemy instance state.
+        """
+        if (
+            not isinstance(value, dict)
+            or cls.__custom_root_type__
+            or getattr(cls.__config__, "table", False)
+        ):
+            return super().validate(value)
+        values, fields_set, validation_error = validate_model(cls, value)
+        if validation_error:
+            raise validation_error
+        model = cls.__new__(cls)
+        object.__setattr__(model, "__dict__", values)
+        object.__setattr__(model, "__fields_set__", fields_set)
+        model._init_private_attributes()
+        return model
+
 
 class BaseUUIDModel(SQLModel):
     id: UUID = Field(
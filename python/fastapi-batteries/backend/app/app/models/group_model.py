@@ -1,6 +1,6 @@
-from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel import Field, Relationship
 from .links_model import LinkGroupUser
-from app.models.base_uuid_model import BaseUUIDModel
+from app.models.base_uuid_model import BaseUUIDModel, SQLModel
 from app.models.user_model import User
 from uuid import UUID
 
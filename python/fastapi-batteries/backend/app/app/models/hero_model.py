@@ -1,5 +1,5 @@
-from sqlmodel import Field, Relationship, SQLModel
-from app.models.base_uuid_model import BaseUUIDModel
+from sqlmodel import Field, Index, Relationship
+from app.models.base_uuid_model import BaseUUIDModel, SQLModel
 from uuid import UUID
 
 
@@ -11,6 +11,14 @@ class HeroBase(SQLModel):
 
 
 class Hero(BaseUUIDModel, HeroBase, table=True):
+    __table_args__ = (
+        Index(
+            "ix_Hero_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
     team: "Team" = Relationship(  # noqa: F821
         back_populates="heroes", sa_relationship_kwargs={"lazy": "joined"}
     )
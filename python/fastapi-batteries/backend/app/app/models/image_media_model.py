@@ -1,7 +1,7 @@
 from .media_model import Media
-from app.models.base_uuid_model import BaseUUIDModel
+from app.models.base_uuid_model import BaseUUIDModel, SQLModel
 from uuid import UUID
-from sqlmodel import Field, SQLModel, Relationship
+from sqlmodel import Field, Relationship
 
 
 class ImageMediaBase(SQLModel):
@@ -18,3 +18,15 @@ class ImageMedia(BaseUUIDModel, ImageMediaBase, table=True):
             "primaryjoin": "ImageMedia.media_id==Media.id",
         }
     )
+    original_id: UUID | None = Field(
+        default=None, foreign_key="ImageMedia.id", index=True
+    )
+    renditions: list["ImageMedia"] = Relationship(
+        sa_relationship_kwargs={
+            # The queries that render them ask for them with selectinload
+            "lazy": "select",
+            "primaryjoin": "ImageMedia.id==ImageMedia.original_id",
+            "order_by": "ImageMedia.width.desc()",
+            "cascade": "all, delete-orphan",
+        }
+    )
@@ -1,5 +1,4 @@
-from app.models.base_uuid_model import BaseUUIDModel
-from sqlmodel import SQLModel
+from app.models.base_uuid_model import BaseUUIDModel, SQLModel
 from app.utils.minio_client import MinioClient
 from app.core.config import settings
 from app import api
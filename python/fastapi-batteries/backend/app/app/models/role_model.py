@@ -1,5 +1,5 @@
-from sqlmodel import SQLModel, Relationship
-from app.models.base_uuid_model import BaseUUIDModel
+from sqlmodel import Relationship
+from app.models.base_uuid_model import BaseUUIDModel, SQLModel
 
 
 class RoleBase(SQLModel):
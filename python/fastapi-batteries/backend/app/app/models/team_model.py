@@ -1,5 +1,5 @@
-from sqlmodel import Field, Relationship, SQLModel
-from app.models.base_uuid_model import BaseUUIDModel
+from sqlmodel import Field, Relationship
+from app.models.base_uuid_model import BaseUUIDModel, SQLModel
 from uuid import UUID
 
 
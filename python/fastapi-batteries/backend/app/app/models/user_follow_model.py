@@ -1,7 +1,7 @@
 from uuid import UUID
 
 from app.models.base_uuid_model import BaseUUIDModel, SQLModel
-from sqlmodel import Column, Field, Boolean
+from sqlmodel import Column, Field, Boolean, Index
 
 
 class UserFollowBase(SQLModel):
@@ -10,4 +10,14 @@ class UserFollowBase(SQLModel):
 
 
 class UserFollow(BaseUUIDModel, UserFollowBase, table=True):
+    __table_args__ = (
+        Index(
+            "ix_UserFollow_user_id_target_user_id",
+            "user_id",
+            "target_user_id",
+            unique=True,
+        ),
+        Index("ix_UserFollow_target_user_id_user_id", "target_user_id", "user_id"),
+    )
+
     is_mutual: bool | None = Field(sa_column=Column(Boolean(), server_default="0"))
@@ -1,9 +1,18 @@
-from app.models.base_uuid_model import BaseUUIDModel
+from app.models.base_uuid_model import BaseUUIDModel, SQLModel
 from app.models.links_model import LinkGroupUser
 from app.models.image_media_model import ImageMedia
 from app.schemas.common_schema import IGenderEnum
 from datetime import datetime
-from sqlmodel import BigInteger, Field, SQLModel, Relationship, Column, DateTime, String
+from sqlmodel import (
+    BigInteger,
+    Field,
+    Relationship,
+    Column,
+    DateTime,
+    Index,
+    String,
+)
+from sqlalchemy import text
 from typing import Optional
 from sqlalchemy_utils import ChoiceType
 from pydantic import EmailStr
@@ -33,6 +42,13 @@ class UserBase(SQLModel):
 
 
 class User(BaseUUIDModel, UserBase, table=True):
+    __table_args__ = (
+        Index(
+            "ix_User_full_name_trgm",
+            text("(first_name || ' ' || last_name) gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
+    )
     hashed_password: str | None = Field(nullable=False, index=True)
     role: Optional["Role"] = Relationship(  # noqa: F821
         back_populates="users", sa_relationship_kwargs={"lazy": "joined"}
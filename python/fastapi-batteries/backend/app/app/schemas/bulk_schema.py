@@ -0,0 +1,20 @@
+from typing import Generic, TypeVar
+from collections.abc import Sequence
+from pydantic import BaseModel
+from pydantic.generics import GenericModel
+
+T = TypeVar("T")
+
+
+class IBulkError(BaseModel):
+    index: int
+    detail: str
+
+
+class IBulkRead(GenericModel, Generic[T]):
+    items: Sequence[T] = []
+    errors: list[IBulkError] = []
+
+    class Config:
+        orm_mode = True
+        read_with_orm_mode = True
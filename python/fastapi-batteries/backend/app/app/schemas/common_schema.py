@@ -20,6 +20,18 @@ class IOrderEnum(str, Enum):
     descendent = "descendent"
 
 
+class ICountStrategyEnum(str, Enum):
+    exact = "exact"
+    estimate = "estimate"
+    cached = "cached"
+
+
+class ILoadProfileEnum(str, Enum):
+    minimal = "minimal"
+    list = "list"
+    full = "full"
+
+
 class TokenType(str, Enum):
     ACCESS = "access_token"
     REFRESH = "refresh_token"
@@ -58,3 +70,33 @@ class IChatResponse(BaseModel):
         if v not in ["start", "stream", "end", "error", "info"]:
             raise ValueError("type must be start, stream or end")
         return v
+
+
+class IRedisPoolStats(BaseModel):
+    max_connections: int
+    created_connections: int
+    idle_connections: int
+    in_use_connections: int
+
+
+class IDatabasePoolStats(BaseModel):
+    pool_size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    average_wait_seconds: float
+    max_wait_seconds: float
+
+
+class IPasswordPoolStats(BaseModel):
+    max_workers: int
+    max_pending: int
+    max_waiting: int
+    waiting: int
+    in_flight: int
+    operations: int
+    rehashes: int
+    rejected: int
+    average_seconds: float
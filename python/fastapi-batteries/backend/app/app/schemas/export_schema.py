@@ -0,0 +1,28 @@
+from enum import Enum
+from pydantic import BaseModel
+
+
+class IExportFormatEnum(str, Enum):
+    csv = "csv"
+    xlsx = "xlsx"
+    parquet = "parquet"
+    arrow = "arrow"
+
+
+class IReportEnum(str, Enum):
+    users = "users"
+    heroes = "heroes"
+
+
+class IExportJobCreate(BaseModel):
+    report: IReportEnum
+    file_format: IExportFormatEnum = IExportFormatEnum.parquet
+
+
+class IExportJobRead(BaseModel):
+    id: str
+    status: str
+    file_name: str | None = None
+    url: str | None = None
+    rows: int | None = None
+    error: str | None = None
@@ -1,15 +1,21 @@
 from app.models.image_media_model import ImageMedia, ImageMediaBase
 from app.models.media_model import Media
 from pydantic import root_validator
-from .media_schema import IMediaRead
+from .media_schema import IMediaCreate, IMediaRead
 from app.utils.partial import optional
 
+_missing = object()
+
 
 # Image Media
 class IImageMediaCreate(ImageMediaBase):
     pass
 
 
+class IImageRenditionCreate(IImageMediaCreate):
+    media: IMediaCreate
+
+
 # All these fields are optional
 @optional
 class IImageMediaUpdate(ImageMediaBase):
@@ -20,18 +26,30 @@ class IImageMediaRead(ImageMediaBase):
     media: IMediaRead | None
 
 
-class IImageMediaReadCombined(ImageMediaBase):
+class IImageRenditionRead(ImageMediaBase):
     link: str | None
 
     @root_validator(pre=True)
     def combine_attributes(cls, values):
         link_fields = {"link": values.get("link", None)}
-        if "media" in values:
-            if isinstance(values["media"], Media) and values["media"].path is not None:
-                link_fields = {"link": values["media"].link}
-
-        image_media_fields = {
-            k: v for k, v in values.items() if k in ImageMedia.__fields__
-        }
+        media = values.get("media", None)
+        if isinstance(media, Media) and media.path is not None:
+            link_fields = {"link": media.link}
+
+        # Only the needed attributes are read, an unloaded relationship is never touched.
+        # Lookups use get, "in" on the GetterDict of an ORM object calls dir() each time
+        image_media_fields = {}
+        for k in ImageMedia.__fields__:
+            value = values.get(k, _missing)
+            if value is not _missing:
+                image_media_fields[k] = value
         output = {**image_media_fields, **link_fields}
+        if "renditions" in cls.__fields__:
+            renditions = values.get("renditions", _missing)
+            if renditions is not _missing:
+                output["renditions"] = renditions
         return output
+
+
+class IImageMediaReadCombined(IImageRenditionRead):
+    renditions: list[IImageRenditionRead] = []
@@ -1,9 +1,10 @@
 from math import ceil
 from typing import Any, Generic, TypeVar
 from collections.abc import Sequence
+from fastapi import Query
 from fastapi_pagination import Params, Page
 from fastapi_pagination.bases import AbstractPage, AbstractParams
-from pydantic import Field
+from pydantic import BaseModel, Field
 from pydantic.generics import GenericModel
 
 DataType = TypeVar("DataType")
@@ -30,6 +31,11 @@ class IGetResponsePaginated(AbstractPage[T], Generic[T]):
 
     __params_type__ = Params  # Set params related to Page
 
+    class Config:
+        # Items are ORM objects, let the route response model read them lazily
+        orm_mode = True
+        read_with_orm_mode = True
+
     @classmethod
     def create(
         cls,
@@ -55,6 +61,37 @@ class IGetResponsePaginated(AbstractPage[T], Generic[T]):
         )
 
 
+class ICursorParams(BaseModel):
+    cursor: str | None = Query(
+        None, description="Opaque cursor returned as next_cursor by the previous page"
+    )
+    size: int = Query(50, ge=1, le=100, description="Page size")
+    include_total: bool = Query(
+        False, description="Also count the total of items (slower)"
+    )
+
+
+class CursorPageBase(GenericModel, Generic[T]):
+    items: Sequence[T]
+    size: int
+    total: int | None = Field(None, description="Only set when include_total is true")
+    next_cursor: str | None = Field(None, description="Cursor of the next page")
+
+    class Config:
+        orm_mode = True
+
+
+class IGetResponseCursorPaginated(GenericModel, Generic[T]):
+    message: str | None = ""
+    meta: dict = {}
+    data: CursorPageBase[T]
+
+    class Config:
+        # Items are ORM objects, let the route response model read them lazily
+        orm_mode = True
+        read_with_orm_mode = True
+
+
 class IGetResponseBase(IResponseBase[DataType], Generic[DataType]):
     message: str | None = "Data got correctly"
 
@@ -78,12 +115,13 @@ def create_response(
 ) -> (
     IResponseBase[DataType]
     | IGetResponsePaginated[DataType]
+    | IGetResponseCursorPaginated[DataType]
     | IGetResponseBase[DataType]
     | IPutResponseBase[DataType]
     | IDeleteResponseBase[DataType]
     | IPostResponseBase[DataType]
 ):
-    if isinstance(data, IGetResponsePaginated):
+    if isinstance(data, (IGetResponsePaginated, IGetResponseCursorPaginated)):
         data.message = "Data paginated correctly" if message is None else message
         data.meta = meta
         return data
@@ -6,7 +6,7 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     refresh_token: str
-    user: IUserRead
+    user: IUserRead | None = None
 
 
 class TokenRead(BaseModel):
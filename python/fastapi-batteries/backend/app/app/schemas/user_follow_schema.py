@@ -1,7 +1,7 @@
 from uuid import UUID
 from app.models.user_follow_model import UserFollowBase
 from app.utils.partial import optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class IUserFollowCreate(UserFollowBase):
@@ -25,3 +25,26 @@ class IUserFollowReadCommon(BaseModel):
     follower_count: int
     following_count: int
     is_mutual: bool
+
+
+class IUserFollowUserRead(BaseModel):
+    id: UUID
+    first_name: str
+    last_name: str
+    follower_count: int | None = 0
+    following_count: int | None = 0
+
+
+class IUserFollowSuggestionRead(IUserFollowUserRead):
+    mutual_count: int
+
+
+class IUserFollowStatusRequest(BaseModel):
+    target_user_ids: list[UUID] = Field(..., max_items=200)
+
+
+class IUserFollowStatus(BaseModel):
+    target_user_id: UUID
+    is_following: bool
+    is_followed_by: bool
+    is_mutual: bool
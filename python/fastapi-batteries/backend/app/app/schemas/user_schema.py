@@ -1,7 +1,8 @@
 from app.utils.partial import optional
 from app.models.user_model import UserBase
 from app.models.group_model import GroupBase
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from app.core.config import settings
 from uuid import UUID
 from enum import Enum
 from .image_media_schema import IImageMediaReadCombined
@@ -52,3 +53,12 @@ class IUserBasicInfo(BaseModel):
 class IUserStatus(str, Enum):
     active = "active"
     inactive = "inactive"
+
+
+class IUserBulkStatusUpdate(BaseModel):
+    user_ids: list[UUID] = Field(..., max_items=settings.BULK_MAX_ITEMS)
+    status: IUserStatus
+
+
+class IUserStatusRead(IUserBasicInfo):
+    is_active: bool
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import logging
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
+from app.core.config import settings
+from app.db.redis_pool import get_redis_client
+
+
+class explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(explain, "postgresql")
+def _compile_explain(element: explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def is_unfiltered(query: Select, table_name: str) -> bool:
+    """True when the query selects every row of `table_name` and nothing else"""
+    return (
+        query.whereclause is None
+        and not query._setup_joins
+        and not query._group_by_clauses
+        and not query._having_criteria
+        and not query._distinct
+        and query._limit_clause is None
+        and query._offset_clause is None
+        and [getattr(f, "name", None) for f in query.columns_clause_froms]
+        == [table_name]
+    )
+
+
+async def get_exact_count(db_session: AsyncSession, query: Select) -> int:
+    response = await db_session.execute(
+        select(func.count()).select_from(query.order_by(None).subquery())
+    )
+    return response.scalar_one()
+
+
+async def get_estimated_count(
+    db_session: AsyncSession, query: Select, table_name: str
+) -> int:
+    """
+    Planner estimate: pg_class.reltuples for a whole table, otherwise the rows
+    predicted by EXPLAIN. Falls back to an exact count if the table was never analyzed.
+    """
+    if is_unfiltered(query, table_name):
+        response = await db_session.execute(
+            text(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"
+            ),
+            {"table": f'"{table_name}"'},
+        )
+        estimate = response.scalar_one_or_none()
+    else:
+        response = await db_session.execute(explain(query.order_by(None)))
+        plan = response.scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = plan[0]["Plan"]["Plan Rows"]
+
+    if estimate is None or estimate < 0:
+        return await get_exact_count(db_session, query)
+    return int(estimate)
+
+
+def get_count_version_key(table_name: str) -> str:
+    return f"count:{table_name}:version"
+
+
+def get_count_cache_key(table_name: str, version: str | int, query: Select) -> str:
+    compiled = query.order_by(None).compile(dialect=postgresql.dialect())
+    params = sorted((k, str(v)) for k, v in compiled.params.items())
+    digest = hashlib.sha256(f"{compiled}{params}".encode()).hexdigest()
+    return f"count:{table_name}:{version}:{digest}"
+
+
+async def get_cached_count(
+    db_session: AsyncSession, query: Select, table_name: str
+) -> int:
+    """
+    Exact count cached in Redis for COUNT_CACHE_TTL_SECONDS. Creating, updating or
+    removing rows bumps the table version, which invalidates every cached count of it.
+    """
+    try:
+        redis_client = await get_redis_client()
+        version = await redis_client.get(get_count_version_key(table_name)) or 0
+        key = get_count_cache_key(table_name, version, query)
+        cached = await redis_client.get(key)
+    except Exception as e:
+        logging.error(f"Unable to read cached count: {e}")
+        return await get_exact_count(db_session, query)
+
+    if cached is not None:
+        return int(cached)
+
+    count = await get_exact_count(db_session, query)
+    try:
+        await redis_client.set(key, count, ex=settings.COUNT_CACHE_TTL_SECONDS)
+    except Exception as e:
+        logging.error(f"Unable to cache count: {e}")
+    return count
+
+
+async def invalidate_cached_counts(table_name: str) -> None:
+    try:
+        redis_client = await get_redis_client()
+        await redis_client.incr(get_count_version_key(table_name))
+    except Exception as e:
+        logging.error(f"Unable to invalidate cached counts: {e}")
@@ -0,0 +1,55 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+from enum import Enum
+from typing import Any
+from uuid import UUID
+from app.utils.exceptions import InvalidCursorException
+
+
+def _dump_value(value: Any) -> list[Any]:
+    if isinstance(value, datetime):
+        return ["datetime", value.isoformat()]
+    if isinstance(value, date):
+        return ["date", value.isoformat()]
+    if isinstance(value, UUID):
+        return ["uuid", str(value)]
+    if isinstance(value, Enum):
+        return ["raw", value.value]
+    return ["raw", value]
+
+
+def _load_value(dumped: list[Any]) -> Any:
+    kind, value = dumped
+    if kind == "datetime":
+        return datetime.fromisoformat(value)
+    if kind == "date":
+        return date.fromisoformat(value)
+    if kind == "uuid":
+        return UUID(value)
+    return value
+
+
+def encode_cursor(value: Any, id: UUID | str, order_by: str, order: str) -> str:
+    """
+    Encodes the last seen (order_by value, id) pair into an opaque cursor, with the
+    ordering it belongs to so it is not used to seek in another one
+    """
+    payload = json.dumps(
+        [order_by, order, _dump_value(value), str(id)], separators=(",", ":")
+    )
+    return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: str, order: str) -> tuple[Any, UUID]:
+    """Decodes a cursor of the given ordering, any other raises InvalidCursorException"""
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        cursor_order_by, cursor_order, value, id = json.loads(
+            urlsafe_b64decode(cursor + padding)
+        )
+        if (cursor_order_by, cursor_order) != (order_by, order):
+            raise ValueError("The cursor belongs to another ordering")
+        return _load_value(value), UUID(id)
+    except (ValueError, TypeError):
+        raise InvalidCursorException(cursor=cursor)
@@ -1,10 +1,18 @@
 from .common_exception import (
     ContentNoChangeException,
     IdNotFoundException,
+    InvalidCursorException,
+    InvalidOrderByException,
     NameExistException,
     NameNotFoundException,
 )
-from .user_exceptions import UserSelfDeleteException
+from .media_exceptions import (
+    FileTooLargeException,
+    ImageTooLargeException,
+    InvalidImageException,
+    UnsupportedMediaTypeException,
+)
+from .user_exceptions import PasswordServiceBusyException, UserSelfDeleteException
 from .user_follow_exceptions import (
     SelfFollowedException,
     UserFollowedException,
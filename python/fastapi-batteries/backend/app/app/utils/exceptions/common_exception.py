@@ -80,3 +80,45 @@ class NameExistException(HTTPException, Generic[ModelType]):
             detail=f"The {model.__name__} name already exists.",
             headers=headers,
         )
+
+
+class InvalidCursorException(HTTPException):
+    def __init__(
+        self,
+        cursor: Optional[str] = None,
+        headers: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if cursor:
+            super().__init__(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"The cursor {cursor} is not valid.",
+                headers=headers,
+            )
+            return
+
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The cursor is not valid.",
+            headers=headers,
+        )
+
+
+class InvalidOrderByException(HTTPException):
+    def __init__(
+        self,
+        order_by: Optional[str] = None,
+        headers: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if order_by:
+            super().__init__(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"The results can not be ordered by {order_by}.",
+                headers=headers,
+            )
+            return
+
+        super().__init__(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="The results can not be ordered by that column.",
+            headers=headers,
+        )
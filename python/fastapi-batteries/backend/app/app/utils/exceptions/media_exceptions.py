@@ -0,0 +1,54 @@
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+
+
+class ImageTooLargeException(HTTPException):
+    def __init__(
+        self,
+        max_pixels: int,
+        headers: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Image exceeds the maximum of {max_pixels} pixels.",
+            headers=headers,
+        )
+
+
+class InvalidImageException(HTTPException):
+    def __init__(
+        self,
+        headers: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        super().__init__(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="The uploaded file is not a valid image.",
+            headers=headers,
+        )
+
+
+class FileTooLargeException(HTTPException):
+    def __init__(
+        self,
+        max_size: int,
+        headers: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the maximum size of {max_size} bytes.",
+            headers=headers,
+        )
+
+
+class UnsupportedMediaTypeException(HTTPException):
+    def __init__(
+        self,
+        content_type: str,
+        headers: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        super().__init__(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported media type {content_type}.",
+            headers=headers,
+        )
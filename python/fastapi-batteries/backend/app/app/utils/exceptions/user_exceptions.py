@@ -13,3 +13,15 @@ class UserSelfDeleteException(HTTPException):
             detail="Users can not delete theirselfs.",
             headers=headers,
         )
+
+
+class PasswordServiceBusyException(HTTPException):
+    def __init__(
+        self,
+        headers: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password checks in progress, try again later.",
+            headers=headers or {"Retry-After": "1"},
+        )
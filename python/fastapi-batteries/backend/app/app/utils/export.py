@@ -0,0 +1,180 @@
+from collections.abc import AsyncIterator, Sequence
+from datetime import date, datetime, timezone
+from enum import Enum
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+from typing import IO, Any
+from uuid import UUID
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from asyncer import asyncify
+from openpyxl import Workbook
+from sqlalchemy.engine import Row
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
+from app.core.config import settings
+from app.schemas.export_schema import IExportFormatEnum
+
+XLSX_READ_SIZE = 1024 * 1024
+
+EXPORT_MEDIA_TYPES = {
+    IExportFormatEnum.csv: "text/csv",
+    IExportFormatEnum.xlsx: (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    ),
+    IExportFormatEnum.parquet: "application/vnd.apache.parquet",
+    IExportFormatEnum.arrow: "application/vnd.apache.arrow.file",
+}
+
+ARROW_TYPES = {
+    bool: pa.bool_(),
+    int: pa.int64(),
+    float: pa.float64(),
+    date: pa.date32(),
+}
+
+
+async def stream_rows(
+    db_session: AsyncSession,
+    query: Select,
+    chunk_size: int | None = None,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Fetches the rows through a server side cursor, `chunk_size` rows at a time,
+    EXPORT_CHUNK_SIZE by default
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    result = await db_session.stream(query.execution_options(yield_per=chunk_size))
+    async for rows in result.partitions(chunk_size):
+        yield rows
+
+
+def to_cell(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        # Spreadsheets have no time zones, cells are written in UTC
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def get_arrow_schema(query: Select) -> pa.Schema:
+    """Arrow types derived from the SQL column types, anything else becomes a string"""
+    fields = []
+    for column in query.column_descriptions:
+        sql_type = column["type"]
+        try:
+            python_type = sql_type.python_type
+        except (AttributeError, NotImplementedError):
+            python_type = str
+        if python_type is datetime:
+            tz = "UTC" if getattr(sql_type, "timezone", False) else None
+            arrow_type = pa.timestamp("us", tz=tz)
+        else:
+            arrow_type = ARROW_TYPES.get(python_type, pa.string())
+        fields.append(pa.field(column["name"], arrow_type))
+    return pa.schema(fields)
+
+
+def rows_to_record_batch(schema: pa.Schema, rows: Sequence[Row]) -> pa.RecordBatch:
+    """Transposes the row tuples and builds every column with a single array call"""
+    columns = list(zip(*rows)) or [()] * len(schema)
+    arrays = []
+    for field, values in zip(schema, columns):
+        if pa.types.is_string(field.type):
+            values = [None if v is None else str(to_cell(v)) for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+async def iter_csv(
+    schema: pa.Schema, batches: AsyncIterator[pa.RecordBatch]
+) -> AsyncIterator[bytes]:
+    """Writes every batch as soon as it is fetched"""
+    sink = BytesIO()
+    writer = pa_csv.CSVWriter(sink, schema)
+    async for batch in batches:
+        await asyncify(writer.write_batch)(batch)
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+    writer.close()
+    yield sink.getvalue()
+
+
+def _append_rows(sheet, batch: pa.RecordBatch) -> None:
+    for row in zip(*(column.to_pylist() for column in batch.columns)):
+        sheet.append([to_cell(value) for value in row])
+
+
+async def iter_xlsx(
+    schema: pa.Schema, batches: AsyncIterator[pa.RecordBatch]
+) -> AsyncIterator[bytes]:
+    """
+    Builds the workbook with openpyxl's write-only mode, which flushes rows to a
+    temporary file, so memory stays flat. A zip archive can only be sent once it
+    is complete, so the file is streamed after the last row.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(schema.names)
+    async for batch in batches:
+        await asyncify(_append_rows)(sheet, batch)
+
+    with SpooledTemporaryFile(max_size=XLSX_READ_SIZE) as file:
+        await asyncify(workbook.save)(file)
+        file.seek(0)
+        while data := await asyncify(file.read)(XLSX_READ_SIZE):
+            yield data
+
+
+async def iter_export(
+    schema: pa.Schema,
+    batches: AsyncIterator[pa.RecordBatch],
+    file_format: IExportFormatEnum,
+) -> AsyncIterator[bytes]:
+    if file_format == IExportFormatEnum.xlsx:
+        content = iter_xlsx(schema, batches)
+    else:
+        content = iter_csv(schema, batches)
+    async for data in content:
+        yield data
+
+
+async def write_export(
+    schema: pa.Schema,
+    batches: AsyncIterator[pa.RecordBatch],
+    file: IO[bytes],
+    file_format: IExportFormatEnum,
+) -> int:
+    """
+    Writes the batches into `file`, Parquet and Arrow get one row group or record
+    batch per fetched chunk. Returns the number of rows written.
+    """
+    rows_count = 0
+
+    if file_format in (IExportFormatEnum.parquet, IExportFormatEnum.arrow):
+        if file_format == IExportFormatEnum.parquet:
+            writer = pq.ParquetWriter(file, schema, compression="zstd")
+        else:
+            writer = pa.ipc.new_file(file, schema)
+        try:
+            async for batch in batches:
+                await asyncify(writer.write_batch)(batch)
+                rows_count += batch.num_rows
+        finally:
+            writer.close()
+        return rows_count
+
+    async def counted() -> AsyncIterator[pa.RecordBatch]:
+        nonlocal rows_count
+        async for batch in batches:
+            rows_count += batch.num_rows
+            yield batch
+
+    async for data in iter_export(schema, counted(), file_format):
+        file.write(data)
+    return rows_count
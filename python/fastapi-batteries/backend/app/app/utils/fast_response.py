@@ -0,0 +1,180 @@
+"""
+Opt-in fast path for the JSON responses of the API routes.
+
+FastAPI validates what an endpoint returns against a clone of its response model,
+turns the result into plain data with `jsonable_encoder` and dumps it with the
+json module. `add_fast_responses` wraps the endpoints of the routes with a
+pydantic response model so that they return an already rendered
+`ORJSONResponse` instead:
+
+- validated mode: the output is validated once against the response model
+  itself and dumped with orjson, `jsonable_encoder` is skipped.
+- trusted mode (`trust_orm`): the ORM objects are read following a plan built
+  once per response model, without running the field validation. Models with
+  validators of their own are still validated.
+"""
+from collections.abc import Callable, Mapping
+from functools import lru_cache, wraps
+from typing import Any
+import orjson
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.dependencies.utils import is_coroutine_callable
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute, request_response
+from fastapi.utils import create_response_field
+from pydantic import BaseModel, ValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from pydantic.fields import (
+    SHAPE_LIST,
+    SHAPE_SEQUENCE,
+    SHAPE_SINGLETON,
+    SHAPE_TUPLE_ELLIPSIS,
+    ModelField,
+)
+from starlette.responses import Response
+
+SEQUENCE_SHAPES = {SHAPE_LIST, SHAPE_SEQUENCE, SHAPE_TUPLE_ELLIPSIS}
+
+# (output key, attribute name, default, nested plan or model to validate, is list)
+FieldPlan = tuple[str, str, Any, "ModelPlan | type[BaseModel] | None", bool]
+ModelPlan = list[FieldPlan]
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.dict(by_alias=True)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def render_json(content: Any) -> bytes:
+    return orjson.dumps(
+        content,
+        default=_default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+
+def _has_validators(model: type[BaseModel]) -> bool:
+    return bool(
+        model.__validators__
+        or model.__pre_root_validators__
+        or model.__post_root_validators__
+    )
+
+
+def _is_model(type_: Any) -> bool:
+    return isinstance(type_, type) and issubclass(type_, BaseModel)
+
+
+@lru_cache(maxsize=None)
+def get_model_plan(model: type[BaseModel]) -> ModelPlan:
+    """How to read every field of `model`, built once per model class"""
+    plan: ModelPlan = []
+    for name, field in model.__fields__.items():
+        nested = None
+        is_list = field.shape in SEQUENCE_SHAPES
+        if _is_model(field.type_) and (field.shape == SHAPE_SINGLETON or is_list):
+            nested = (
+                field.type_
+                if _has_validators(field.type_)
+                else get_model_plan(field.type_)
+            )
+        plan.append((field.alias, name, field.get_default(), nested, is_list))
+    return plan
+
+
+def _dump_nested(
+    value: Any, nested: ModelPlan | type[BaseModel] | None
+) -> dict[str, Any] | Any:
+    if value is None or nested is None:
+        return value
+    if isinstance(nested, list):
+        return dump_trusted(nested, value)
+    # Models with validators of their own, e.g. the link of an image
+    return nested.validate(value).dict(by_alias=True)
+
+
+def dump_trusted(plan: ModelPlan, obj: Any) -> dict[str, Any]:
+    """Reads the planned fields from a mapping, a pydantic model or an ORM object"""
+    if isinstance(obj, Mapping):
+        get = obj.get
+    else:
+
+        def get(name: str, default: Any) -> Any:
+            return getattr(obj, name, default)
+
+    output = {}
+    for key, name, default, nested, is_list in plan:
+        value = get(name, default)
+        if is_list and value is not None:
+            output[key] = [_dump_nested(item, nested) for item in value]
+        else:
+            output[key] = _dump_nested(value, nested)
+    return output
+
+
+def validate_response(field: ModelField, content: Any) -> Any:
+    value, errors = field.validate(content, {}, loc=("response",))
+    if isinstance(errors, ErrorWrapper):
+        errors = [errors]
+    if errors:
+        raise ValidationError(errors, field.type_)
+    return value
+
+
+def get_serializer(route: APIRoute, trust_orm: bool) -> Callable[[Any], bytes]:
+    field = create_response_field(name="response", type_=route.response_model)
+    if trust_orm and _is_model(route.response_model):
+        plan = get_model_plan(route.response_model)
+        return lambda content: render_json(dump_trusted(plan, content))
+    return lambda content: render_json(validate_response(field, content))
+
+
+def is_fast_response_route(route: Any) -> bool:
+    """Routes whose response FastAPI would only validate and encode"""
+    return (
+        isinstance(route, APIRoute)
+        and route.response_model is not None
+        and isinstance(route.response_class, DefaultPlaceholder)
+        # The headers set on an injected Response, e.g. by the cache decorator
+        and route.dependant.response_param_name is None
+        and route.response_model_include is None
+        and route.response_model_exclude is None
+        and route.response_model_by_alias
+        and not route.response_model_exclude_unset
+        and not route.response_model_exclude_defaults
+        and not route.response_model_exclude_none
+    )
+
+
+def wrap_endpoint(route: APIRoute, trust_orm: bool) -> None:
+    call = route.dependant.call
+    is_coroutine = is_coroutine_callable(call)
+    serialize = get_serializer(route, trust_orm)
+    status_code = route.status_code or 200
+
+    @wraps(call)
+    async def fast_call(**values: Any) -> Any:
+        if is_coroutine:
+            content = await call(**values)
+        else:
+            content = await run_in_threadpool(call, **values)
+        if isinstance(content, Response):
+            return content
+        return Response(
+            serialize(content),
+            status_code=status_code,
+            media_type=ORJSONResponse.media_type,
+        )
+
+    route.dependant.call = fast_call
+    route.app = request_response(route.get_route_handler())
+
+
+def add_fast_responses(app: FastAPI, trust_orm: bool = False) -> None:
+    """Call it once all the routers are included"""
+    for route in app.routes:
+        if is_fast_response_route(route):
+            wrap_endpoint(route, trust_orm)
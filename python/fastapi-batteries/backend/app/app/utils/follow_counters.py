@@ -0,0 +1,146 @@
+import logging
+from collections import defaultdict
+from uuid import UUID
+from sqlalchemy import Integer, column, func, or_, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.db.redis_pool import get_redis_client
+from app.models.user_follow_model import UserFollow
+from app.models.user_model import User
+
+FOLLOW_COUNTERS_KEY = "follow_counters:deltas"
+FOLLOW_COUNTERS_FLUSHING_KEY = "follow_counters:flushing"
+
+CounterDeltas = dict[UUID, tuple[int, int]]  # user id -> (followers, followings)
+
+
+async def increment_follow_counters(
+    *, user_id: UUID, target_user_id: UUID, delta: int, db_session: AsyncSession
+) -> None:
+    """
+    Adds `delta` to the following count of the user and the follower count of the
+    target user. The rows are updated server side in id order inside the caller's
+    transaction, or buffered in Redis when FOLLOW_COUNTERS_BUFFERED is set.
+    """
+    if settings.FOLLOW_COUNTERS_BUFFERED:
+        try:
+            redis_client = await get_redis_client()
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.hincrby(FOLLOW_COUNTERS_KEY, f"{user_id}:followings", delta)
+                pipe.hincrby(FOLLOW_COUNTERS_KEY, f"{target_user_id}:followers", delta)
+                await pipe.execute()
+            return
+        except Exception as e:
+            logging.error(f"Unable to buffer follow counters: {e}")
+
+    deltas = {user_id: (0, delta), target_user_id: (delta, 0)}
+    for id in sorted(deltas):
+        followers, followings = deltas[id]
+        await db_session.execute(
+            update(User)
+            .where(User.id == id)
+            .values(
+                follower_count=func.coalesce(User.follower_count, 0) + followers,
+                following_count=func.coalesce(User.following_count, 0) + followings,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def apply_follow_counter_deltas(
+    deltas: CounterDeltas, db_session: AsyncSession
+) -> None:
+    """Applies every delta with a single UPDATE ... FROM (VALUES ...) statement"""
+    if not deltas:
+        return
+    rows = values(
+        column("id", PG_UUID(as_uuid=True)),
+        column("followers", Integer),
+        column("followings", Integer),
+        name="deltas",
+    ).data(
+        [(id, followers, followings) for id, (followers, followings) in deltas.items()]
+    )
+    await db_session.execute(
+        update(User)
+        .where(User.id == rows.c.id)
+        .values(
+            follower_count=func.coalesce(User.follower_count, 0) + rows.c.followers,
+            following_count=func.coalesce(User.following_count, 0) + rows.c.followings,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def flush_follow_counters(db_session: AsyncSession) -> int:
+    """
+    Moves the buffered deltas out of Redis into `User`. The hash is read and
+    deleted in one transaction, so overlapping flushes never claim the same
+    deltas and increments arriving during the flush go to a fresh hash. If the
+    update fails the deltas are given back to the buffer. A worker dying between
+    both loses them until the daily reconciliation recounts the followers.
+    Returns the number of users updated.
+    """
+    redis_client = await get_redis_client()
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hgetall(FOLLOW_COUNTERS_KEY)
+        # Left by a flush of the former rename based layout that did not finish
+        pipe.hgetall(FOLLOW_COUNTERS_FLUSHING_KEY)
+        pipe.delete(FOLLOW_COUNTERS_KEY, FOLLOW_COUNTERS_FLUSHING_KEY)
+        buffered, unfinished, _ = await pipe.execute()
+
+    deltas: defaultdict[UUID, list[int]] = defaultdict(lambda: [0, 0])
+    for field, value in [*buffered.items(), *unfinished.items()]:
+        id, counter = field.rsplit(":", 1)
+        deltas[UUID(id)][0 if counter == "followers" else 1] += int(value)
+
+    changed = {id: tuple(delta) for id, delta in deltas.items() if any(delta)}
+    try:
+        await apply_follow_counter_deltas(changed, db_session)
+        await db_session.commit()
+    except Exception:
+        await db_session.rollback()
+        async with redis_client.pipeline(transaction=True) as pipe:
+            for id, (followers, followings) in changed.items():
+                if followers:
+                    pipe.hincrby(FOLLOW_COUNTERS_KEY, f"{id}:followers", followers)
+                if followings:
+                    pipe.hincrby(FOLLOW_COUNTERS_KEY, f"{id}:followings", followings)
+            await pipe.execute()
+        raise
+    return len(changed)
+
+
+async def reconcile_follow_counters(db_session: AsyncSession) -> int:
+    """
+    Recomputes both counters of every user from `UserFollow`, fixing any drift.
+    Pending buffered deltas are flushed first. Returns the number of users fixed.
+    """
+    if settings.FOLLOW_COUNTERS_BUFFERED:
+        await flush_follow_counters(db_session)
+
+    followers = (
+        select(func.count(UserFollow.id))
+        .where(UserFollow.target_user_id == User.id)
+        .scalar_subquery()
+    )
+    followings = (
+        select(func.count(UserFollow.id))
+        .where(UserFollow.user_id == User.id)
+        .scalar_subquery()
+    )
+    response = await db_session.execute(
+        update(User)
+        .where(
+            or_(
+                User.follower_count.is_distinct_from(followers),
+                User.following_count.is_distinct_from(followings),
+            )
+        )
+        .values(follower_count=followers, following_count=followings)
+        .execution_options(synchronize_session=False)
+    )
+    await db_session.commit()
+    return response.rowcount
@@ -1,9 +1,16 @@
 # https://github.com/Longdh57/fastapi-minio
 
+import time
+from collections import OrderedDict
+from typing import BinaryIO
 from app.utils.uuid6 import uuid7
+from asyncer import asyncify
 from datetime import timedelta
 from minio import Minio
 from pydantic import BaseModel
+import urllib3
+
+PRESIGNED_URL_EXPIRES = timedelta(days=7)
 
 
 class IMinioResponse(BaseModel):
@@ -12,19 +19,80 @@ class IMinioResponse(BaseModel):
     url: str
 
 
+class PresignedUrlCache:
+    """
+    Size-bounded cache of presigned urls keyed by (bucket, object name). Entries
+    expire before the urls do, so a cached url always has time left to be used.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = min(ttl, PRESIGNED_URL_EXPIRES.total_seconds() / 2)
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+
+    def get(self, bucket_name: str, object_name: str) -> str | None:
+        key = (bucket_name, object_name)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, url = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return url
+
+    def set(self, bucket_name: str, object_name: str, url: str) -> None:
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        key = (bucket_name, object_name)
+        self._entries[key] = (time.monotonic() + self.ttl, url)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class MinioClient:
+    """
+    Thread safe, meant to be created once per process: the connections are kept
+    in a urllib3 pool and presigned urls are cached, so `presigned_get_object`
+    is CPU only on a cache hit. The *_async methods run in the threadpool.
+    """
+
     def __init__(
-        self, minio_url: str, access_key: str, secret_key: str, bucket_name: str
+        self,
+        minio_url: str,
+        access_key: str,
+        secret_key: str,
+        bucket_name: str,
+        pool_size: int = 10,
+        url_cache_ttl: float = 0,
+        url_cache_max_size: int = 10_000,
     ):
         self.minio_url = minio_url
         self.access_key = access_key
         self.secret_key = secret_key
         self.bucket_name = bucket_name
+        self.http_client = urllib3.PoolManager(
+            num_pools=2,
+            maxsize=pool_size,
+            timeout=urllib3.Timeout(connect=5, read=60),
+            retries=urllib3.Retry(
+                total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]
+            ),
+        )
         self.client = Minio(
             self.minio_url,
             access_key=self.access_key,
             secret_key=self.secret_key,
             secure=False,
+            http_client=self.http_client,
+        )
+        self.url_cache = PresignedUrlCache(
+            ttl=url_cache_ttl, max_size=url_cache_max_size
         )
         self.make_bucket()
 
@@ -34,10 +102,15 @@ class MinioClient:
         return self.bucket_name
 
     def presigned_get_object(self, bucket_name, object_name):
-        # Request URL expired after 7 days
-        url = self.client.presigned_get_object(
-            bucket_name=bucket_name, object_name=object_name, expires=timedelta(days=7)
-        )
+        url = self.url_cache.get(bucket_name, object_name)
+        if url is None:
+            # Request URL expired after 7 days
+            url = self.client.presigned_get_object(
+                bucket_name=bucket_name,
+                object_name=object_name,
+                expires=PRESIGNED_URL_EXPIRES,
+            )
+            self.url_cache.set(bucket_name, object_name, url)
         return url
 
     def check_file_name_exists(self, bucket_name, file_name):
@@ -48,7 +121,18 @@ class MinioClient:
             print(f"[x] Exception: {e}")
             return False
 
-    def put_object(self, file_data, file_name, content_type):
+    def put_object(
+        self,
+        file_data,
+        file_name,
+        content_type,
+        length: int = -1,
+        part_size: int = 10 * 1024 * 1024,
+    ):
+        """
+        Streams `file_data`, which is read one part at a time. With a known `length`
+        files above `part_size` are sent as a multipart upload of that part size.
+        """
         try:
             object_name = f"{uuid7()}{file_name}"
             self.client.put_object(
@@ -56,8 +140,8 @@ class MinioClient:
                 object_name=object_name,
                 data=file_data,
                 content_type=content_type,
-                length=-1,
-                part_size=10 * 1024 * 1024,
+                length=length,
+                part_size=part_size,
             )
             url = self.presigned_get_object(
                 bucket_name=self.bucket_name, object_name=object_name
@@ -68,3 +152,35 @@ class MinioClient:
             return data_file
         except Exception as e:
             raise e
+
+    def get_object(self, object_name: str) -> bytes:
+        response = self.client.get_object(
+            bucket_name=self.bucket_name, object_name=object_name
+        )
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    async def put_object_async(
+        self,
+        file_data: BinaryIO,
+        file_name: str,
+        content_type: str,
+        length: int = -1,
+        part_size: int = 10 * 1024 * 1024,
+    ) -> IMinioResponse:
+        return await asyncify(self.put_object)(
+            file_data=file_data,
+            file_name=file_name,
+            content_type=content_type,
+            length=length,
+            part_size=part_size,
+        )
+
+    async def get_object_async(self, object_name: str) -> bytes:
+        return await asyncify(self.get_object)(object_name)
+
+    def close(self) -> None:
+        self.http_client.clear()
@@ -1,7 +1,12 @@
-from typing import Any
-from PIL import Image
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from io import BytesIO
+from typing import Any
+from PIL import Image, ImageOps
 from pydantic import BaseModel
+from app.core.config import settings
 
 
 class IModifiedImageResponse(BaseModel):
@@ -11,22 +16,85 @@ class IModifiedImageResponse(BaseModel):
     file_data: Any
 
 
-def modify_image(image: BytesIO):
-    pil_image = Image.open(image)
-    file_format = pil_image.format
+class ImageTooLargeError(ValueError):
+    pass
+
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def render_image(
+    data: bytes, sizes: list[int], file_format: str, max_pixels: int
+) -> list[IModifiedImageResponse]:
+    """
+    Decodes the image once and returns one rendition per size, largest first,
+    each fitting in a `size` x `size` box. Images are never upscaled and the
+    renditions are saved without EXIF/ICC/XMP metadata.
+    """
+    # Only the header is read by open, the pixel count is checked before decoding
+    Image.MAX_IMAGE_PIXELS = None
+    with Image.open(BytesIO(data)) as image:
+        if image.width * image.height > max_pixels:
+            raise ImageTooLargeError(
+                f"{image.width}x{image.height} exceeds {max_pixels}"
+            )
+        largest = max(sizes)
+        # JPEG can be decoded at a reduced scale, a no-op for other formats
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+
+    has_alpha = "A" in image.getbands() or "transparency" in image.info
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    # Drops EXIF, ICC and XMP so none of them is written into the renditions
+    image.info = {}
+
+    renditions: list[IModifiedImageResponse] = []
+    for size in sorted(set(sizes), reverse=True):
+        # Each rendition is resized from the previous one, cheaper than the original
+        image.thumbnail((size, size), Image.LANCZOS)
+        if renditions and renditions[-1].width == image.width:
+            continue
+        buffer = BytesIO()
+        image.save(buffer, format=file_format, quality=settings.IMAGE_QUALITY)
+        renditions.append(
+            IModifiedImageResponse(
+                width=image.width,
+                height=image.height,
+                file_format=file_format,
+                file_data=buffer.getvalue(),
+            )
+        )
+    return renditions
+
+
+def get_image_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
 
-    # Prints out (1280, 960)
-    # print(pil_image.size)
-    # Image can be resized here
 
-    in_mem_file = BytesIO()
+def shutdown_image_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
 
-    # format here would be something like "JPEG". See below link for more info.
-    pil_image.save(in_mem_file, format=file_format)
 
-    return IModifiedImageResponse(
-        width=pil_image.width,
-        height=pil_image.height,
-        file_format=file_format,
-        file_data=in_mem_file.getvalue(),
+async def render_image_in_pool(data: bytes) -> list[IModifiedImageResponse]:
+    """Runs `render_image` in the process pool so the event loop is never blocked"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_image_executor(),
+        partial(
+            render_image,
+            data,
+            settings.IMAGE_RENDITION_SIZES,
+            settings.IMAGE_RENDITION_FORMAT,
+            settings.IMAGE_MAX_PIXELS,
+        ),
     )
@@ -0,0 +1,56 @@
+import logging
+import time
+from redis.asyncio import Redis
+from app.core.config import settings
+from app.db.redis_pool import get_redis_client
+from app.schemas.role_schema import IRoleRead
+
+ROLES_CACHE_CHANNEL = "roles_cache:invalidate"
+
+
+class RolesCache:
+    """In-process copy of the roles list sent as login metadata"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entry: tuple[float, list[IRoleRead]] | None = None
+
+    def get(self) -> list[IRoleRead] | None:
+        if self._entry is None:
+            return None
+        expires_at, roles = self._entry
+        if expires_at < time.monotonic():
+            self._entry = None
+            return None
+        return roles
+
+    def set(self, roles: list[IRoleRead]) -> None:
+        if self.ttl > 0:
+            self._entry = (time.monotonic() + self.ttl, roles)
+
+    def clear(self) -> None:
+        self._entry = None
+
+
+roles_cache = RolesCache(ttl=settings.ROLES_CACHE_TTL_SECONDS)
+
+
+async def invalidate_roles() -> None:
+    """Drops the local copy and notifies the other workers."""
+    roles_cache.clear()
+    try:
+        redis_client = await get_redis_client()
+        await redis_client.publish(ROLES_CACHE_CHANNEL, "")
+    except Exception as e:
+        logging.error(f"Unable to publish roles cache invalidation: {e}")
+
+
+async def listen_roles_invalidations(redis_client: Redis) -> None:
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    await pubsub.subscribe(ROLES_CACHE_CHANNEL)
+    try:
+        async for _ in pubsub.listen():
+            roles_cache.clear()
+    finally:
+        await pubsub.unsubscribe(ROLES_CACHE_CHANNEL)
+        await pubsub.close()
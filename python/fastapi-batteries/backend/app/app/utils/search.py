@@ -0,0 +1,27 @@
+from sqlalchemy import func, literal, literal_column, or_
+from sqlalchemy.sql.expression import ColumnElement
+
+# Must stay identical to the indexed expression of ix_User_full_name_trgm, the
+# separator is a literal so the planner can match it
+FULL_NAME_SEPARATOR = literal_column("' '")
+
+
+def escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def trigram_match(expression: ColumnElement, text: str) -> ColumnElement:
+    """
+    True when `text` is a substring of `expression` or similar to one of its words.
+    Both operators are served by a pg_trgm GIN index on `expression`.
+    """
+    return or_(
+        literal(text).op("<%")(expression.self_group()),
+        # Backslash is the default LIKE escape character of PostgreSQL
+        expression.ilike(f"%{escape_like(text)}%"),
+    )
+
+
+def trigram_score(expression: ColumnElement, text: str) -> ColumnElement:
+    """Relevance of `expression` for `text` between 0 and 1"""
+    return func.word_similarity(text, expression)
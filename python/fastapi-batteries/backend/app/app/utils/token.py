@@ -1,32 +1,125 @@
-from datetime import timedelta
+import hashlib
+import time
 from uuid import UUID
 from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
 from app.models.user_model import User
 from app.schemas.common_schema import TokenType
+from app.utils.token_revocation import publish_token_revocation
+
+# The tokens of a user are a sorted set of token SHA1s scored by their expiry, the
+# key itself expires with its last token. Sets left by the former SET layout are
+# converted the first time they are written, their tokens keep the key's expiry.
+ADD_TOKENS_SCRIPT = """
+local now = tonumber(ARGV[1])
+local only_if_tracked = ARGV[2] == '1'
+local added = 0
+for i, key in ipairs(KEYS) do
+    local token_hash = ARGV[1 + i * 2]
+    local expires_at = tonumber(ARGV[2 + i * 2])
+    local key_type = redis.call('TYPE', key).ok
+    if key_type ~= 'none' or not only_if_tracked then
+        if key_type == 'set' then
+            local ttl = redis.call('TTL', key)
+            local legacy_expires_at = ttl > 0 and now + ttl or expires_at
+            local legacy_tokens = redis.call('SMEMBERS', key)
+            redis.call('DEL', key)
+            for _, legacy_token in ipairs(legacy_tokens) do
+                redis.call('ZADD', key, legacy_expires_at, redis.sha1hex(legacy_token))
+            end
+        end
+        redis.call('ZREMRANGEBYSCORE', key, '-inf', now)
+        redis.call('ZADD', key, expires_at, token_hash)
+        local last = redis.call('ZRANGE', key, -1, -1, 'WITHSCORES')
+        redis.call('EXPIREAT', key, math.ceil(tonumber(last[2])))
+        added = added + 1
+    end
+end
+return added
+"""
+
+# 1 when the token can be used: the user has no tracked tokens or it is a live one
+IS_TOKEN_VALID_SCRIPT = """
+local key_type = redis.call('TYPE', KEYS[1]).ok
+if key_type == 'none' then
+    return 1
+end
+if key_type == 'set' then
+    return redis.call('SISMEMBER', KEYS[1], ARGV[1])
+end
+local expires_at = redis.call('ZSCORE', KEYS[1], ARGV[2])
+if expires_at and tonumber(expires_at) > tonumber(ARGV[3]) then
+    return 1
+end
+return 0
+"""
+
+
+# Registered once, each call runs them by their SHA1 on the client it is given and
+# loads them only if the server does not have them. As bytes they need no client to
+# be encoded, so none is bound to them.
+_add_tokens = AsyncScript(None, ADD_TOKENS_SCRIPT.encode())
+_is_token_valid = AsyncScript(None, IS_TOKEN_VALID_SCRIPT.encode())
+
+
+def get_token_key(user_id: UUID | str, token_type: TokenType) -> str:
+    return f"user:{user_id}:{token_type.value}"
+
+
+def get_token_hash(token: str) -> str:
+    # Same digest as redis.sha1hex, used when converting the former sets
+    return hashlib.sha1(token.encode()).hexdigest()
+
+
+async def add_tokens_to_redis(
+    redis_client: Redis,
+    user_id: UUID | str,
+    tokens: list[tuple[str, TokenType, int]],
+    only_if_tracked: bool = False,
+) -> int:
+    """
+    Stores every (token, type, expire minutes) of the user with a single script
+    call. With `only_if_tracked` a token is only stored if the user already has
+    tracked tokens of its type. Returns the number of tokens stored.
+    """
+    now = time.time()
+    keys = []
+    args = [now, int(only_if_tracked)]
+    for token, token_type, expire_time in tokens:
+        keys.append(get_token_key(user_id, token_type))
+        args.extend([get_token_hash(token), now + expire_time * 60])
+    return await _add_tokens(keys=keys, args=args, client=redis_client)
 
 
 async def add_token_to_redis(
     redis_client: Redis,
-    user: User,
+    user_id: UUID | str,
     token: str,
     token_type: TokenType,
-    expire_time: int | None = None,
-):
-    token_key = f"user:{user.id}:{token_type}"
-    valid_tokens = await get_valid_tokens(redis_client, user.id, token_type)
-    await redis_client.sadd(token_key, token)
-    if not valid_tokens:
-        await redis_client.expire(token_key, timedelta(minutes=expire_time))
+    expire_time: int,
+    only_if_tracked: bool = False,
+) -> bool:
+    added = await add_tokens_to_redis(
+        redis_client, user_id, [(token, token_type, expire_time)], only_if_tracked
+    )
+    return added == 1
 
 
-async def get_valid_tokens(redis_client: Redis, user_id: UUID, token_type: TokenType):
-    token_key = f"user:{user_id}:{token_type}"
-    valid_tokens = await redis_client.smembers(token_key)
-    return valid_tokens
+async def is_token_valid(
+    redis_client: Redis, user_id: UUID | str, token: str, token_type: TokenType
+) -> bool:
+    """O(1) whatever the number of sessions of the user, one round trip"""
+    result = await _is_token_valid(
+        keys=[get_token_key(user_id, token_type)],
+        args=[token, get_token_hash(token), time.time()],
+        client=redis_client,
+    )
+    return result == 1
 
 
 async def delete_tokens(redis_client: Redis, user: User, token_type: TokenType):
-    token_key = f"user:{user.id}:{token_type}"
-    valid_tokens = await redis_client.smembers(token_key)
-    if valid_tokens is not None:
-        await redis_client.delete(token_key)
+    """Revokes every token of that type, for both verification modes"""
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(get_token_key(user.id, token_type))
+        publish_token_revocation(pipe, user.id, token_type)
+        await pipe.execute()
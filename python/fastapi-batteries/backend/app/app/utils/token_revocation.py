@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from uuid import UUID
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from app.core.config import settings
+from app.schemas.common_schema import TokenType
+
+TOKEN_REVOCATIONS_STREAM = "token_revocations"
+READ_BLOCK_MILLISECONDS = 5000
+PRUNE_INTERVAL_SECONDS = 600
+
+
+def get_max_token_lifetime() -> float:
+    minutes = max(
+        settings.ACCESS_TOKEN_EXPIRE_MINUTES, settings.REFRESH_TOKEN_EXPIRE_MINUTES
+    )
+    return minutes * 60
+
+
+class TokenRevocations:
+    """
+    In-process revocation filter for the stateless verification mode.
+
+    Revoking the tokens of a user stores a cut-off time per (user id, token type),
+    every token of that type issued before it is rejected. Cut-offs older than the
+    longest token lifetime can not match a live token and are pruned.
+    """
+
+    def __init__(self):
+        self._revoked_before: dict[tuple[str, str], float] = {}
+
+    def revoke(
+        self, user_id: UUID | str, token_type: TokenType, revoked_at: float
+    ) -> None:
+        key = (str(user_id), token_type.value)
+        self._revoked_before[key] = max(self._revoked_before.get(key, 0), revoked_at)
+
+    def is_revoked(
+        self, user_id: UUID | str, token_type: TokenType, issued_at: float | None
+    ) -> bool:
+        revoked_before = self._revoked_before.get((str(user_id), token_type.value))
+        # Tokens without an issue time predate every revocation
+        return revoked_before is not None and (issued_at or 0) <= revoked_before
+
+    def prune(self, older_than: float) -> None:
+        self._revoked_before = {
+            k: v for k, v in self._revoked_before.items() if v >= older_than
+        }
+
+    def clear(self) -> None:
+        self._revoked_before.clear()
+
+    def __len__(self) -> int:
+        return len(self._revoked_before)
+
+
+token_revocations = TokenRevocations()
+
+
+def publish_token_revocation(
+    pipe: Pipeline, user_id: UUID | str, token_type: TokenType
+) -> None:
+    """
+    Applies the revocation locally and queues it on `pipe` for the other workers.
+    The stream is trimmed to the entries that can still match a live token.
+    """
+    revoked_at = time.time()
+    token_revocations.revoke(user_id, token_type, revoked_at)
+    min_id = int((revoked_at - get_max_token_lifetime()) * 1000)
+    pipe.xadd(
+        TOKEN_REVOCATIONS_STREAM,
+        {
+            "user_id": str(user_id),
+            "token_type": token_type.value,
+            "revoked_at": repr(revoked_at),
+        },
+        minid=max(min_id, 0),
+        approximate=True,
+    )
+
+
+def _apply_entries(entries: list[tuple[str, dict[str, str]]]) -> None:
+    for _, fields in entries:
+        token_revocations.revoke(
+            fields["user_id"],
+            TokenType(fields["token_type"]),
+            float(fields["revoked_at"]),
+        )
+
+
+async def load_token_revocations(redis_client: Redis, batch_size: int = 1000) -> str:
+    """Replays the whole stream, returns the id of the last entry read"""
+    last_id = "0"
+    while True:
+        entries = await redis_client.xrange(
+            TOKEN_REVOCATIONS_STREAM, min=f"({last_id}", count=batch_size
+        )
+        if not entries:
+            return last_id
+        _apply_entries(entries)
+        last_id = entries[-1][0]
+
+
+async def listen_token_revocations(redis_client: Redis, last_id: str) -> None:
+    pruned_at = time.monotonic()
+    while True:
+        try:
+            response = await redis_client.xread(
+                {TOKEN_REVOCATIONS_STREAM: last_id}, block=READ_BLOCK_MILLISECONDS
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Unable to read token revocations: {e}")
+            await asyncio.sleep(1)
+            continue
+        for _, entries in response:
+            _apply_entries(entries)
+            last_id = entries[-1][0]
+
+        if time.monotonic() - pruned_at > PRUNE_INTERVAL_SECONDS:
+            token_revocations.prune(time.time() - get_max_token_lifetime())
+            pruned_at = time.monotonic()
@@ -0,0 +1,68 @@
+import os
+from fastapi import UploadFile
+from app.utils.exceptions import FileTooLargeException
+
+SNIFF_SIZE = 512
+
+# (offset, signature, content type), checked in order
+MAGIC_NUMBERS = [
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (8, b"WEBP", "image/webp"),
+    (4, b"ftypavif", "image/avif"),
+    (4, b"ftypheic", "image/heic"),
+    (0, b"BM", "image/bmp"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"PK\x03\x04", "application/zip"),
+    (0, b"\x1f\x8b", "application/gzip"),
+    (0, b"\x1aE\xdf\xa3", "video/webm"),
+    (4, b"ftyp", "video/mp4"),
+    (0, b"ID3", "audio/mpeg"),
+    (0, b"OggS", "audio/ogg"),
+]
+
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+# The formats the image pipeline decodes, anything else is stored untouched
+IMAGE_CONTENT_TYPES = {
+    "image/jpeg",
+    "image/png",
+    "image/gif",
+    "image/webp",
+    "image/bmp",
+    "image/tiff",
+}
+
+
+def sniff_content_type(head: bytes) -> str:
+    """Content type from the leading bytes, the client supplied one is not trusted"""
+    for offset, signature, content_type in MAGIC_NUMBERS:
+        if head[offset : offset + len(signature)] != signature:
+            continue
+        # WEBP sits inside a RIFF container, other RIFF payloads (WAV, AVI) do not count
+        if content_type == "image/webp" and head[:4] != b"RIFF":
+            continue
+        return content_type
+    return DEFAULT_CONTENT_TYPE
+
+
+async def inspect_upload(upload_file: UploadFile, max_size: int) -> tuple[str, int]:
+    """
+    Returns the sniffed content type and the size of the upload, leaving the file
+    at its start. Only the first SNIFF_SIZE bytes are read.
+    """
+    size = upload_file.size
+    if size is None:
+        # Starlette spools the upload to a temporary file, seeking is cheap
+        size = upload_file.file.seek(0, os.SEEK_END)
+    if size > max_size:
+        raise FileTooLargeException(max_size=max_size)
+
+    await upload_file.seek(0)
+    head = await upload_file.read(SNIFF_SIZE)
+    await upload_file.seek(0)
+    return sniff_content_type(head), size
@@ -0,0 +1,134 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from uuid import UUID
+from redis.asyncio import Redis
+from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.db.redis_pool import get_redis_client
+from app.models.user_model import User
+
+USER_CACHE_CHANNEL = "user_cache:invalidate"
+# User ids per invalidation message
+INVALIDATION_CHUNK_SIZE = 1000
+
+
+def get_token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class UserCache:
+    """
+    Size-bounded, short-TTL in-process cache of authenticated users.
+
+    Entries are keyed by (user_id, token hash) and hold a detached snapshot
+    of the `User` graph, so a cached entry is never shared with a live session.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[str, str], tuple[float, User]] = OrderedDict()
+        self._keys_by_user: dict[str, set[tuple[str, str]]] = {}
+
+    def get(self, user_id: UUID | str, token: str) -> User | None:
+        key = (str(user_id), get_token_hash(token))
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            self._pop(key)
+            return None
+        self._entries.move_to_end(key)
+        return user
+
+    def set(self, user_id: UUID | str, token: str, user: User) -> None:
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        key = (str(user_id), get_token_hash(token))
+        self._entries[key] = (time.monotonic() + self.ttl, _detach(user))
+        self._entries.move_to_end(key)
+        self._keys_by_user.setdefault(key[0], set()).add(key)
+        while len(self._entries) > self.max_size:
+            self._pop(next(iter(self._entries)))
+
+    def invalidate(self, user_id: UUID | str) -> None:
+        for key in self._keys_by_user.pop(str(user_id), set()):
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_user.clear()
+
+    def _pop(self, key: tuple[str, str]) -> None:
+        self._entries.pop(key, None)
+        user_keys = self._keys_by_user.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._keys_by_user[key[0]]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _detach(user: User) -> User:
+    # Copy the already loaded attributes into a throwaway session, no SQL is emitted
+    with Session() as session:
+        snapshot = session.merge(user, load=False)
+    return snapshot
+
+
+user_cache = UserCache(
+    ttl=settings.USER_CACHE_TTL_SECONDS, max_size=settings.USER_CACHE_MAX_SIZE
+)
+
+
+async def get_cached_user(
+    user_id: UUID | str, token: str, db_session: AsyncSession
+) -> User | None:
+    """Returns the cached user attached to `db_session` without a database round trip."""
+    snapshot = user_cache.get(user_id, token)
+    if snapshot is None:
+        return None
+    return await db_session.merge(snapshot, load=False)
+
+
+async def invalidate_user(user_id: UUID | str) -> None:
+    """Drops the user from the local cache and notifies the other workers."""
+    await invalidate_users([user_id])
+
+
+async def invalidate_users(
+    user_ids: Sequence[UUID | str], chunk_size: int = INVALIDATION_CHUNK_SIZE
+) -> None:
+    """Same for many users, their ids are sent in a few messages on one round trip."""
+    if not user_ids:
+        return
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
+    try:
+        redis_client = await get_redis_client()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for start in range(0, len(user_ids), chunk_size):
+                chunk = user_ids[start : start + chunk_size]
+                pipe.publish(USER_CACHE_CHANNEL, ",".join(str(id) for id in chunk))
+            await pipe.execute()
+    except Exception as e:
+        logging.error(f"Unable to publish user cache invalidation: {e}")
+
+
+async def listen_user_invalidations(redis_client: Redis) -> None:
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    await pubsub.subscribe(USER_CACHE_CHANNEL)
+    try:
+        async for message in pubsub.listen():
+            for user_id in message["data"].split(","):
+                user_cache.invalidate(user_id)
+    finally:
+        await pubsub.unsubscribe(USER_CACHE_CHANNEL)
+        await pubsub.close()
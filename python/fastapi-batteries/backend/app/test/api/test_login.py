@@ -60,3 +60,49 @@ class TestPostLogin:
             assert response.status_code == expected_status
             if expected_response is not None:
                 assert response.json() == expected_response
+
+
+@pytest.mark.asyncio
+class TestChangePassword:
+    async def test_stateless_verification(self, test_client, monkeypatch):
+        monkeypatch.setattr(settings, "TOKEN_STATELESS_VERIFICATION", True)
+        async for client in test_client:
+            credentials = {
+                "email": settings.FIRST_SUPERUSER_EMAIL,
+                "password": settings.FIRST_SUPERUSER_PASSWORD,
+            }
+            response = await client.post("/login", json=credentials)
+            old_token = response.json()["data"]["access_token"]
+            new_password = f"{settings.FIRST_SUPERUSER_PASSWORD}-changed"
+
+            response = await client.post(
+                "/login/change_password",
+                json={
+                    "current_password": settings.FIRST_SUPERUSER_PASSWORD,
+                    "new_password": new_password,
+                },
+                headers={"Authorization": f"Bearer {old_token}"},
+            )
+            assert response.status_code == 200
+            new_token = response.json()["data"]["access_token"]
+
+            # The returned token is issued after the revocation of the old ones
+            response = await client.get(
+                "/user", headers={"Authorization": f"Bearer {new_token}"}
+            )
+            assert response.status_code == 200
+            response = await client.get(
+                "/user", headers={"Authorization": f"Bearer {old_token}"}
+            )
+            assert response.status_code == 403
+
+            # Restore the password for the other tests
+            response = await client.post(
+                "/login/change_password",
+                json={
+                    "current_password": new_password,
+                    "new_password": settings.FIRST_SUPERUSER_PASSWORD,
+                },
+                headers={"Authorization": f"Bearer {new_token}"},
+            )
+            assert response.status_code == 200
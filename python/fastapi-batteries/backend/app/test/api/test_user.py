@@ -2,6 +2,7 @@ import pytest
 from httpx import AsyncClient
 from app.main import app
 from typing import AsyncGenerator
+from uuid import uuid4
 from app.core.config import settings
 
 url = "http://fastapi.localhost/api/v1"
@@ -20,6 +21,10 @@ class TestPostLogin:
         [
             ("get", "/user", None, 200, None),
             ("get", "/user/list", None, 200, None),
+            ("get", "/user/list/cursor?size=10&include_total=true", None, 200, None),
+            ("get", "/user/list/cursor?cursor=invalid", None, 400, None),
+            ("get", "/user/list/cursor?order_by=last_name&size=1", None, 200, None),
+            ("get", "/user/list/cursor?order_by=birthdate", None, 422, None),
             (
                 "get",
                 "/user/list/by_role_name?user_status=active&page=1&size=50",
@@ -27,6 +32,34 @@ class TestPostLogin:
                 200,
                 None,
             ),
+            ("get", "/user/search?text=admin&size=10", None, 200, None),
+            ("get", "/user/following/suggestions", None, 200, None),
+            (
+                "post",
+                "/user/following/status",
+                {"target_user_ids": []},
+                200,
+                None,
+            ),
+            (
+                "put",
+                "/user/bulk/status",
+                {"user_ids": [], "status": "active"},
+                200,
+                None,
+            ),
+            (
+                "put",
+                "/user/bulk/status",
+                {
+                    "user_ids": [
+                        str(uuid4()) for _ in range(settings.BULK_MAX_ITEMS + 1)
+                    ],
+                    "status": "active",
+                },
+                422,
+                None,
+            ),
         ],
     )
     async def test(
@@ -63,3 +96,38 @@ class TestPostLogin:
             assert response.status_code == expected_status
             if expected_response is not None:
                 assert response.json() == expected_response
+
+
+@pytest.mark.asyncio
+class TestCursorPagination:
+    @pytest.mark.parametrize(
+        "next_query, expected_status",
+        [
+            ("order_by=last_name", 200),
+            ("order_by=id", 400),
+            ("order_by=is_active", 400),
+            ("order_by=last_name&order=descendent", 400),
+        ],
+    )
+    async def test_cursor_ordering(self, test_client, next_query, expected_status):
+        async for client in test_client:
+            credentials = {
+                "email": settings.FIRST_SUPERUSER_EMAIL,
+                "password": settings.FIRST_SUPERUSER_PASSWORD,
+            }
+            response = await client.post("/login", json=credentials)
+            access_token = response.json()["data"]["access_token"]
+            headers = {"Authorization": f"Bearer {access_token}"}
+
+            response = await client.get(
+                "/user/list/cursor?order_by=last_name&size=1", headers=headers
+            )
+            cursor = response.json()["data"]["next_cursor"]
+            assert cursor is not None
+
+            # A cursor only continues the ordering of the page that returned it
+            response = await client.get(
+                f"/user/list/cursor?{next_query}&size=1&cursor={cursor}",
+                headers=headers,
+            )
+            assert response.status_code == expected_status
@@ -0,0 +1,25 @@
+import time
+from collections.abc import Callable
+from typing import Any
+
+UNITS = {"ms": 1_000, "us": 1_000_000}
+
+
+def timed(
+    label: str,
+    run: Callable[[], Any],
+    rounds: int,
+    baseline: float | None = None,
+    unit: str = "ms",
+) -> float:
+    """
+    Prints the mean time of `run` over `rounds` calls, and the speedup against
+    `baseline` when given. Returns the mean in seconds.
+    """
+    start = time.perf_counter()
+    for _ in range(rounds):
+        run()
+    elapsed = (time.perf_counter() - start) / rounds
+    speedup = f"  x{baseline / elapsed:.1f}" if baseline else ""
+    print(f"{label:<32}{elapsed * UNITS[unit]:10.2f} {unit}{speedup}")
+    return elapsed
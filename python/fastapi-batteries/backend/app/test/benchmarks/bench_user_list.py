@@ -0,0 +1,88 @@
+"""
+Serialization of a 100 users page of /user/list, FastAPI's default path against
+the fast path of app.utils.fast_response. No database nor server is needed.
+
+    python -m test.benchmarks.bench_user_list
+"""
+import asyncio
+import json
+from uuid import uuid4
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi_pagination import Params
+from app.api.v1.endpoints.user import router
+from app.models.image_media_model import ImageMedia
+from app.models.media_model import Media
+from app.models.role_model import Role
+from app.models.user_model import User
+from app.schemas.response_schema import IGetResponsePaginated, create_response
+from app.utils.fast_response import get_serializer
+from test.benchmarks import timed
+
+PAGE_SIZE = 100
+ROUNDS = 200
+
+
+def get_users_page() -> IGetResponsePaginated:
+    role = Role(id=uuid4(), name="user", description="User role")
+    users = []
+    for i in range(PAGE_SIZE):
+        # No media path, so the link is built without MinIO
+        image = ImageMedia(
+            media=Media(id=uuid4(), title="avatar"),
+            width=256,
+            height=256,
+            file_format="WEBP",
+            renditions=[ImageMedia(media=Media(id=uuid4()), width=64, height=64)],
+        )
+        users.append(
+            User(
+                id=uuid4(),
+                first_name=f"First {i}",
+                last_name=f"Last {i}",
+                email=f"user{i}@example.com",
+                hashed_password="",
+                role_id=role.id,
+                role=role,
+                image=image,
+                follower_count=i,
+                following_count=i,
+            )
+        )
+    page = IGetResponsePaginated.create(
+        users, total=10_000, params=Params(page=1, size=PAGE_SIZE)
+    )
+    return create_response(data=page)
+
+
+async def default_path(route, content) -> bytes:
+    body = await serialize_response(
+        field=route.response_field, response_content=content
+    )
+    return JSONResponse(body).body
+
+
+def main() -> None:
+    route = next(r for r in router.routes if r.path == "/list")
+    content = get_users_page()
+    loop = asyncio.new_event_loop()
+    validated = get_serializer(route, trust_orm=False)
+    trusted = get_serializer(route, trust_orm=True)
+
+    expected = json.loads(loop.run_until_complete(default_path(route, content)))
+    assert json.loads(validated(content)) == expected
+    assert json.loads(trusted(content)) == expected
+
+    print(f"/user/list, {PAGE_SIZE} users per page, mean of {ROUNDS} rounds")
+    baseline = timed(
+        "FastAPI default",
+        lambda: loop.run_until_complete(default_path(route, content)),
+        ROUNDS,
+    )
+    timed("orjson, validated", lambda: validated(content), ROUNDS, baseline)
+    timed("orjson, trusted ORM", lambda: trusted(content), ROUNDS, baseline)
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Validation of request bodies of the API, SQLModel's own validate against the one
+of app.models.base_uuid_model.SQLModel used by the schemas. The bodies go through
+a field built the same way FastAPI builds the body fields of the endpoints.
+
+    python -m test.benchmarks.bench_validation
+"""
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+from uuid import uuid4
+import sqlmodel
+from fastapi.utils import create_response_field
+from app.models.base_uuid_model import SQLModel
+from app.schemas.hero_schema import IHeroCreate
+from app.schemas.user_schema import IUserCreate, IUserUpdate
+from test.benchmarks import timed
+
+ROUNDS = 2000
+
+USER_CREATE = {
+    "first_name": "Jane",
+    "last_name": "Doe",
+    "email": "jane.doe@example.com",
+    "password": "admin",
+    "birthdate": "1990-01-01T00:00:00+00:00",
+    "role_id": str(uuid4()),
+    "phone": "+1 555 0100",
+    "gender": "female",
+    "state": "California",
+    "country": "USA",
+    "address": "1 Main Street",
+}
+USER_UPDATE = {"phone": "+1 555 0199", "address": "2 Main Street"}
+HEROES_CREATE = [
+    {"name": f"Hero {i}", "secret_name": f"Secret {i}", "age": 30, "team_id": None}
+    for i in range(100)
+]
+
+PAYLOADS: list[tuple[str, Any, Any]] = [
+    ("IUserCreate", IUserCreate, USER_CREATE),
+    ("IUserUpdate", IUserUpdate, USER_UPDATE),
+    ("list[IHeroCreate] x100", list[IHeroCreate], HEROES_CREATE),
+]
+
+
+def get_validator(type_: Any) -> Callable[[Any], Any]:
+    field = create_response_field(name="body", type_=type_)
+
+    def validate(payload: Any) -> Any:
+        value, errors = field.validate(payload, {}, loc=("body",))
+        assert not errors, errors
+        return value
+
+    return validate
+
+
+def get_validators() -> list[tuple[str, Callable[[Any], Any], Any]]:
+    return [(label, get_validator(t), payload) for label, t, payload in PAYLOADS]
+
+
+def main() -> None:
+    # The fields bind the validate method of the models when they are built
+    app_validate = SQLModel.__dict__["validate"]
+    SQLModel.validate = classmethod(sqlmodel.SQLModel.validate.__func__)
+    try:
+        baselines = get_validators()
+    finally:
+        SQLModel.validate = app_validate
+    validators = get_validators()
+
+    print(f"Request body validation, mean of {ROUNDS} rounds")
+    for (label, baseline_validate, payload), (_, validate, _) in zip(
+        baselines, validators
+    ):
+        assert baseline_validate(payload) == validate(payload)
+        baseline = timed(
+            f"{label}, SQLModel", partial(baseline_validate, payload), ROUNDS, unit="us"
+        )
+        timed(f"{label}, app", partial(validate, payload), ROUNDS, baseline, unit="us")
+
+
+if __name__ == "__main__":
+    main()